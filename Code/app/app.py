@@ -1,16 +1,44 @@
 import gc
 import logging
+import queue
 import threading
+from functools import partial
+from typing import Callable
+
 import dearpygui.dearpygui as dpg
 
 from Code.handlers import ModManager
 
 
 class App:
+    # Задачи от фоновых потоков и таймеров; выполняются в цикле отрисовки
+    ui_tasks_queue: "queue.SimpleQueue[Callable[[], None]]" = queue.SimpleQueue()
+
+    @staticmethod
+    def call_in_ui(callback: Callable, *args, **kwargs) -> None:
+        """Ставит вызов в очередь главного потока (перед следующим кадром)."""
+        App.ui_tasks_queue.put(partial(callback, *args, **kwargs))
+
+    @staticmethod
+    def _run_ui_tasks() -> None:
+        while True:
+            try:
+                task = App.ui_tasks_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                task()
+            except Exception as e:
+                logging.error(f"Error in UI task: {e}", exc_info=True)
+
     @staticmethod
     def run() -> None:
         try:
-            dpg.start_dearpygui()
+            # Тот же цикл, что и в dpg.start_dearpygui, плюс очередь UI-задач
+            while dpg.is_dearpygui_running():
+                App._run_ui_tasks()
+                dpg.render_dearpygui_frame()
 
         except Exception as e:
             logging.error(f"Error during running GUI: {e}")
@@ -18,6 +46,11 @@ class App:
         finally:
             logging.debug("Destroying app...")
 
+            # Воркеры пула фоновых задач не daemon: отпускаем их до ожидания потоков
+            from .app_interface import AppInterface
+
+            AppInterface._executor.shutdown(wait=False, cancel_futures=True)
+
             active_threads = [
                 t
                 for t in threading.enumerate()
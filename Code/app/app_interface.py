@@ -1,10 +1,18 @@
 import json
 import logging
+import os
 import threading
-import webbrowser
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from types import CodeType
 
 import dearpygui.dearpygui as dpg
-import requests
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 import Code.dpg_tools as dpg_tools
 from Code.app_vars import AppConfig
@@ -12,15 +20,59 @@ from Code.game import Game
 from Code.handlers import ModManager
 from Code.loc import Localization as loc
 
+from .app import App
 from .mods_tab import ModsTab
 from .settings_tab import SettingsTab
 
 logger = logging.getLogger(__name__)
 
+_SESSION = None  # requests.Session, создаётся при первой проверке версии
+
+RELEASES_URL = "https://github.com/zangys/Barotrauma_Modding_Tool_Enchanted/releases/latest"
+
+_CATEGORY_CONFIG = {
+    "сaс-devs": {
+        "name_field": "name",
+        "info_field": "role",
+        "get_info": lambda v: loc.get_string(v),
+    },
+    "сaс-translators": {
+        "name_field": "name",
+        "info_field": "code",
+        "get_info": lambda v: loc.get_string(
+            "cac-translators-thx", lang_code=loc.get_string(f"lang_code-{v}")
+        ),
+    },
+    "cac-special-thanks": {
+        "name_field": "to",
+        "info_field": "desc",
+        "get_info": lambda v: loc.get_string(v),
+    },
+}
+
+
+def _get_session():
+    global _SESSION
+    if _SESSION is None:
+        import requests
+
+        _SESSION = requests.Session()
+    return _SESSION
+
 
 class AppInterface:
     TAG_VERSION_ITEM = "menu_item_version_check"
 
+    RESIZE_DEBOUNCE_SEC = 0.1
+    CONSOLE_CACHE_SIZE = 128
+    CONSOLE_MAX_LINES = 500
+
+    _contrib_cache: tuple[int, dict] | None = None
+    _resize_timer: threading.Timer | None = None
+    _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="app-io")
+    _compile_cache: OrderedDict[str, tuple[CodeType, str]] = OrderedDict()
+    _console_lines: deque[int | str] = deque(maxlen=CONSOLE_MAX_LINES)
+
     @staticmethod
     def initialize():
         AppInterface._create_viewport_menu_bar()
@@ -35,11 +87,28 @@ class AppInterface:
         dpg.set_viewport_resize_callback(AppInterface._res_callback)
         dpg_tools.rc_windows()
 
-        # Асинхронная проверка версии
-        threading.Thread(target=AppInterface._async_check_version, daemon=True).start()
+        # Асинхронная проверка версии и предзагрузка contributors.json
+        AppInterface._executor.submit(AppInterface._async_check_version)
+        AppInterface._executor.submit(AppInterface._prefetch_contributors)
 
     @staticmethod
     def _res_callback() -> None:
+        # Во время перетаскивания края окна событие приходит сотни раз в секунду,
+        # поэтому перестраиваем окна только после паузы
+        if AppInterface._resize_timer is not None:
+            AppInterface._resize_timer.cancel()
+
+        # Таймер лишь ставит перестройку в очередь главного потока
+        timer = threading.Timer(
+            AppInterface.RESIZE_DEBOUNCE_SEC, App.call_in_ui, (AppInterface._commit_resize,)
+        )
+        timer.daemon = True
+        AppInterface._resize_timer = timer
+        timer.start()
+
+    @staticmethod
+    def _commit_resize() -> None:
+        AppInterface._resize_timer = None
         dpg_tools.rc_windows()
         # ИСПРАВЛЕНИЕ 1: Сохраняем в конфиг Python, а не в DPG виджет
         AppConfig.set(
@@ -73,9 +142,7 @@ class AppInterface:
             dpg.add_menu_item(
                 label=f"{loc.get_string('cur-version-latest')} ...",
                 tag=AppInterface.TAG_VERSION_ITEM,
-                callback=lambda: webbrowser.open(
-                    "https://github.com/zangys/Barotrauma_Modding_Tool_Enchanted/releases/latest"
-                ),
+                callback=AppInterface._open_release_page,
                 enabled=False, 
             )
 
@@ -85,17 +152,42 @@ class AppInterface:
                     callback=AppInterface._setup_console,
                 )
 
+    @staticmethod
+    def _open_release_page():
+        import webbrowser
+
+        webbrowser.open(RELEASES_URL)
+
     @staticmethod
     def _async_check_version():
         is_latest = None
         repo_api_url = "https://api.github.com/repos/zangys/Barotrauma_Modding_Tool_Enchanted/releases/latest"
-        
+        cache_path = AppConfig.get_data_root_path() / "version_cache.json"
+        cached = AppInterface._load_version_cache(cache_path)
+
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
         try:
-            response = requests.get(repo_api_url, timeout=10)
-            if response.status_code == 200:
+            response = _get_session().get(repo_api_url, headers=headers, timeout=(3, 5))
+            if response.status_code == 304:
+                is_latest = AppConfig.version == cached.get("tag_name", "")
+            elif response.status_code == 200:
                 latest_data = response.json()
                 latest_tag = latest_data.get("tag_name", "")
                 is_latest = AppConfig.version == latest_tag
+                AppInterface._save_version_cache(
+                    cache_path,
+                    {
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "tag_name": latest_tag,
+                        "fetched_at": time.time(),
+                    },
+                )
             else:
                 logger.warning(f"GitHub API Error: {response.status_code}")
         except Exception as e:
@@ -103,6 +195,25 @@ class AppInterface:
 
         AppInterface._update_version_ui(is_latest)
 
+    @staticmethod
+    def _load_version_cache(cache_path) -> dict:
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _save_version_cache(cache_path, data: dict) -> None:
+        tmp_path = cache_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to save version cache: {e}")
+
     @staticmethod
     def _update_version_ui(is_latest: bool | None):
         """Обновляет пункт меню с версией."""
@@ -132,13 +243,14 @@ class AppInterface:
             command = app_data.strip()
             if command:
                 AppInterface._append_console_output(f"> {command}")
-                try:
-                    exec_result = eval(command, globals())
+                code, mode = AppInterface._compile_command(command)
+                if mode == "eval":
+                    exec_result = eval(code, globals())
                     if exec_result is not None:
                         AppInterface._append_console_output(str(exec_result))
-                except SyntaxError:
-                    exec(command, globals())
-                    
+                else:
+                    exec(code, globals())
+
         except Exception as e:
             AppInterface._append_console_output(f"Error: {e}")
 
@@ -146,34 +258,71 @@ class AppInterface:
             dpg.set_value(sender, "")
             dpg.focus_item(sender)
 
+    @staticmethod
+    def _compile_command(command: str) -> tuple[CodeType, str]:
+        cache = AppInterface._compile_cache
+        entry = cache.get(command)
+        if entry is not None:
+            cache.move_to_end(command)
+            return entry
+
+        try:
+            entry = (compile(command, "<console>", "eval"), "eval")
+        except SyntaxError:
+            entry = (compile(command, "<console>", "exec"), "exec")
+
+        cache[command] = entry
+        if len(cache) > AppInterface.CONSOLE_CACHE_SIZE:
+            cache.popitem(last=False)
+
+        return entry
+
     @staticmethod
     def _append_console_output(text):
-        if dpg.does_item_exist("console_output"):
-            dpg.add_text(text, parent="console_output", wrap=0)
-            if dpg.does_item_exist("console_window"):
-                y_max = dpg.get_y_scroll_max("console_window")
-                dpg.set_y_scroll("console_window", y_max)
+        if not dpg.does_item_exist("console_output"):
+            return
+
+        stick_to_bottom = False
+        if dpg.does_item_exist("console_window"):
+            stick_to_bottom = dpg.get_y_scroll(
+                "console_window"
+            ) >= dpg.get_y_scroll_max("console_window")
+
+        lines = AppInterface._console_lines
+        if len(lines) == lines.maxlen:
+            oldest = lines[0]
+            if dpg.does_item_exist(oldest):
+                dpg.delete_item(oldest)
+
+        lines.append(dpg.add_text(text, parent="console_output", wrap=0))
+
+        if stick_to_bottom:
+            dpg.set_y_scroll(
+                "console_window", dpg.get_y_scroll_max("console_window")
+            )
 
     @staticmethod
     def _setup_console():
         if dpg.does_item_exist("debug_console"):
             dpg.delete_item("debug_console")
-
-        with dpg.window(label="Debug Console", tag="debug_console", width=600, height=400):
-            with dpg.child_window(
-                tag="console_window", border=True, autosize_x=True, height=-30
-            ):
-                with dpg.group(tag="console_output"):
-                    dpg.add_text("Debug Console Initialized")
-
-            dpg.add_input_text(
-                label="Command",
-                tag="console_input",
-                on_enter=True,
-                callback=AppInterface._process_command,
-                width=-1
-            )
-            dpg.focus_item("console_input")
+        AppInterface._console_lines.clear()
+
+        with dpg.mutex():
+            with dpg.window(label="Debug Console", tag="debug_console", width=600, height=400):
+                with dpg.child_window(
+                    tag="console_window", border=True, autosize_x=True, height=-30
+                ):
+                    with dpg.group(tag="console_output"):
+                        dpg.add_text("Debug Console Initialized")
+
+                dpg.add_input_text(
+                    label="Command",
+                    tag="console_input",
+                    on_enter=True,
+                    callback=AppInterface._process_command,
+                    width=-1
+                )
+                dpg.focus_item("console_input")
 
         dpg_tools.rc_windows()
 
@@ -206,74 +355,85 @@ class AppInterface:
             dpg.focus_item("cac_window")
             return
 
-        contributors_path = AppConfig.get_data_root_path() / "contributors.json"
-
         try:
-            with open(contributors_path, "r", encoding="utf-8") as f:
-                contributors_data = json.load(f)
+            contributors_data = AppInterface._load_contributors()
         except Exception as e:
             logger.error(f"Failed to load contributors: {e}")
             return
 
-        category_config = {
-            "сaс-devs": {
-                "name_field": "name",
-                "info_field": "role",
-                "get_info": lambda v: loc.get_string(v),
-            },
-            "сaс-translators": {
-                "name_field": "name",
-                "info_field": "code",
-                "get_info": lambda v: loc.get_string("cac-translators-thx", lang_code=loc.get_string(f"lang_code-{v}")),
-            },
-            "cac-special-thanks": {
-                "name_field": "to",
-                "info_field": "desc",
-                "get_info": lambda v: loc.get_string(v),
-            },
-        }
-
-        with dpg.window(
-            label=loc.get_string("cac-window-name"),
-            tag="cac_window",
-            width=500,
-            height=600,
-            no_collapse=True
-        ):
-            for category_label, contributors_list in contributors_data.items():
-                if not isinstance(contributors_list, list): continue
+        with dpg.mutex():
+            with dpg.window(
+                label=loc.get_string("cac-window-name"),
+                tag="cac_window",
+                width=500,
+                height=600,
+                no_collapse=True
+            ):
+                for category_label, contributors_list in contributors_data.items():
+                    if not isinstance(contributors_list, list): continue
                 
-                with dpg.collapsing_header(label=loc.get_string(category_label), default_open=True):
-                    conf = category_config.get(category_label)
-                    
-                    for person in contributors_list:
-                        name = person.get(conf["name_field"], "Unknown") if conf else "Unknown"
-                        
-                        info_text = ""
-                        if conf and conf["info_field"] in person:
-                            raw_info = person[conf["info_field"]]
-                            try:
-                                info_text = conf["get_info"](raw_info)
-                            except Exception:
-                                info_text = str(raw_info)
-
-                        with dpg.group(horizontal=True):
-                            dpg.add_text(f"• {name}", color=(0, 150, 255))
-                            if info_text:
-                                dpg.add_text(f"- {info_text}", color=(200, 200, 200), wrap=350)
+                    with dpg.collapsing_header(label=loc.get_string(category_label), default_open=True):
+                        conf = _CATEGORY_CONFIG.get(category_label)
+                        if conf:
+                            name_field = conf["name_field"]
+                            info_field = conf["info_field"]
+                            get_info = conf["get_info"]
+
+                        for person in contributors_list:
+                            if not conf:
+                                name = "Unknown"
+                                info_text = ""
+                            else:
+                                name = person.get(name_field, "Unknown")
+                                raw_info = person.get(info_field)
+                                info_text = ""
+                                if raw_info is not None:
+                                    try:
+                                        info_text = get_info(raw_info)
+                                    except Exception:
+                                        info_text = str(raw_info)
+
+                            with dpg.group(horizontal=True):
+                                dpg.add_text(f"• {name}", color=(0, 150, 255))
+                                if info_text:
+                                    dpg.add_text(f"- {info_text}", color=(200, 200, 200), wrap=350)
+
+    @staticmethod
+    def _prefetch_contributors() -> None:
+        try:
+            AppInterface._load_contributors()
+        except Exception as e:
+            logger.warning(f"Failed to prefetch contributors: {e}")
+
+    @staticmethod
+    def _load_contributors() -> dict:
+        """Возвращает содержимое contributors.json, перечитывая файл только при изменении mtime."""
+        contributors_path = AppConfig.get_data_root_path() / "contributors.json"
+        mtime = os.stat(contributors_path).st_mtime_ns
+
+        cache = AppInterface._contrib_cache
+        if cache is not None and cache[0] == mtime:
+            return cache[1]
+
+        raw = contributors_path.read_bytes()
+        contributors_data = orjson.loads(raw) if orjson else json.loads(raw)
+
+        AppInterface._contrib_cache = (mtime, contributors_data)
+        return contributors_data
 
     @staticmethod
     def rebuild_interface():
         current_tab = dpg.get_value("main_tab_bar")
 
-        dpg.delete_item("main_tab_bar", children_only=True)
-        dpg.delete_item("main_view_bar")
+        with dpg.mutex():
+            dpg.delete_item("main_tab_bar", children_only=True)
+            dpg.delete_item("main_view_bar")
 
-        AppInterface._create_viewport_menu_bar()
-        SettingsTab.create()
-        ModsTab.create()
+            AppInterface._create_viewport_menu_bar()
+            SettingsTab.create()
+            ModsTab.create()
 
-        if current_tab:
-            dpg.set_value("main_tab_bar", current_tab)
+            if current_tab:
+                dpg.set_value("main_tab_bar", current_tab)
 
         dpg_tools.rc_windows()
\ No newline at end of file
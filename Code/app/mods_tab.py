@@ -1,14 +1,10 @@
 import logging
 import threading
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Set, Tuple
 
 import dearpygui.dearpygui as dpg
 
-try:
-    from Code.app import App
-except ImportError:
-    App = None
-
+from Code.app.app import App
 from Code.app_vars import AppConfig
 from Code.handlers import ModManager
 from Code.loc import Localization as loc
@@ -17,16 +13,16 @@ from Code.package import ModUnit
 logger = logging.getLogger(__name__)
 
 
-class UIColors:
-    AUTHOR = (0, 102, 204)
-    LICENSE = (169, 169, 169)
-    VERSION = (34, 139, 34)
-    ERROR = (255, 70, 70)
-    WARNING = (255, 255, 100)
-    DEFAULT = (255, 255, 255)
-    LABEL = (100, 150, 250)
-    VALUE = (200, 200, 250)
-    SUCCESS = (50, 205, 50)
+# Цвета текста строк и окна подробностей
+AUTHOR_COLOR = (0, 102, 204)
+LICENSE_COLOR = (169, 169, 169)
+VERSION_COLOR = (34, 139, 34)
+ERROR_COLOR = (255, 70, 70)
+WARNING_COLOR = (255, 255, 100)
+DEFAULT_COLOR = (255, 255, 255)
+LABEL_COLOR = (100, 150, 250)
+VALUE_COLOR = (200, 200, 250)
+SUCCESS_COLOR = (50, 205, 50)
 
 
 class ModsTab:
@@ -34,6 +30,20 @@ class ModsTab:
     active_mod_search_text: str = ""
     inactive_mod_search_text: str = ""
 
+    SEARCH_DEBOUNCE_SEC = 0.12
+    _search_timer: Optional[threading.Timer] = None
+
+    # Уже отрисованные строки: {status: {mod_id: (group_tag, signature)}} и их порядок
+    _rendered: Dict[str, Dict[str, Tuple[str, Tuple]]] = {"active": {}, "inactive": {}}
+    _rendered_order: Dict[str, List[str]] = {"active": [], "inactive": []}
+    # Подсказки и контекстные меню строк создаются при первом наведении/клике
+    _rows_with_tooltip: Set[str] = set()
+    _row_popups: Dict[str, int | str] = {}
+    # Неизменяемые подписи (без подстановок), сбрасываются при смене перевода
+    _labels: Dict[str, str] = {}
+    # Последние выведенные (ошибки, предупреждения); None — текст счётчиков перезаписан
+    _last_counts: Optional[Tuple[int, int]] = None
+
     TAG_TAB = "mod_tab"
     TAG_ACTIVE_LIST = "active_mods_child"
     TAG_INACTIVE_LIST = "inactive_mods_child"
@@ -44,9 +54,12 @@ class ModsTab:
     TAG_PRESET_COMBO = "preset_combo"
     TAG_PRESET_INPUT = "preset_new_name_input"
     TAG_PRESET_MSG = "preset_status_msg"
+    TAG_ROW_HANDLERS = "mod_row_handler_registry"
 
     @staticmethod
     def create():
+        loc.add_change_listener(ModsTab._labels.clear)
+
         with dpg.tab(label=loc.get_string("mod-tab-label"), parent="main_tab_bar", tag=ModsTab.TAG_TAB):
             ModsTab._create_toolbar()
             ModsTab._create_info_panel()
@@ -85,7 +98,7 @@ class ModsTab:
                 )
                 
                 # Статус
-                dpg.add_text("", tag=ModsTab.TAG_PRESET_MSG, color=UIColors.WARNING)
+                dpg.add_text("", tag=ModsTab.TAG_PRESET_MSG, color=WARNING_COLOR)
 
             dpg.add_separator()
 
@@ -130,6 +143,16 @@ class ModsTab:
                         ):
                             pass
 
+        # Списки созданы заново, старые строки удалены вместе с вкладкой
+        for status in ModsTab._rendered:
+            ModsTab._rendered[status].clear()
+            ModsTab._rendered_order[status].clear()
+
+        for group_tag in list(ModsTab._row_popups):
+            ModsTab._forget_row(group_tag)
+
+        ModsTab._rows_with_tooltip.clear()
+        ModsTab._last_counts = None
         ModsTab.render_mods()
 
     @staticmethod
@@ -164,26 +187,26 @@ class ModsTab:
     @staticmethod
     def _create_info_panel():
         with dpg.group(horizontal=True):
-            dpg.add_text(loc.get_string("label-directory-found"), color=UIColors.LABEL)
+            dpg.add_text(loc.get_string("label-directory-found"), color=LABEL_COLOR)
             dpg.add_text(
                 str(AppConfig.get("barotrauma_dir", loc.get_string("base-not-set"))),
-                color=UIColors.VALUE,
+                color=VALUE_COLOR,
             )
 
         has_cs = AppConfig.get("has_cs")
         with dpg.group(horizontal=True):
-            dpg.add_text(loc.get_string("label-enable-cs-scripting"), color=UIColors.LABEL)
+            dpg.add_text(loc.get_string("label-enable-cs-scripting"), color=LABEL_COLOR)
             dpg.add_text(
                 loc.get_string("base-yes") if has_cs else loc.get_string("base-no"),
-                color=UIColors.SUCCESS if has_cs else UIColors.ERROR,
+                color=SUCCESS_COLOR if has_cs else ERROR_COLOR,
             )
 
         has_lua = AppConfig.get("has_lua")
         with dpg.group(horizontal=True):
-            dpg.add_text(loc.get_string("label-lua-installed"), color=UIColors.LABEL)
+            dpg.add_text(loc.get_string("label-lua-installed"), color=LABEL_COLOR)
             dpg.add_text(
                 loc.get_string("base-yes") if has_lua else loc.get_string("base-no"),
-                color=UIColors.SUCCESS if has_lua else UIColors.ERROR,
+                color=SUCCESS_COLOR if has_lua else ERROR_COLOR,
             )
 
         with dpg.group(horizontal=True):
@@ -224,6 +247,7 @@ class ModsTab:
     def on_process_errors_clicked():
         dpg.set_value(ModsTab.TAG_ERROR_TEXT, "...")
         dpg.set_value(ModsTab.TAG_WARNING_TEXT, "...")
+        ModsTab._last_counts = None
         
         threading.Thread(target=ModsTab._thread_process_errors, daemon=True).start()
 
@@ -243,7 +267,17 @@ class ModsTab:
             ModsTab.active_mod_search_text = val
         elif user_data == "inactive":
             ModsTab.inactive_mod_search_text = val
-        ModsTab.render_mods()
+
+        # Перерисовываем только после паузы в наборе текста
+        if ModsTab._search_timer is not None:
+            ModsTab._search_timer.cancel()
+
+        ModsTab._search_timer = threading.Timer(
+            ModsTab.SEARCH_DEBOUNCE_SEC,
+            lambda: ModsTab._dispatch_ui_update(ModsTab.render_mods),
+        )
+        ModsTab._search_timer.daemon = True
+        ModsTab._search_timer.start()
 
     @staticmethod
     def sort_active_mods():
@@ -255,81 +289,217 @@ class ModsTab:
 
     @staticmethod
     def render_mods():
-        ModsTab._render_mod_list(
-            parent_tag=ModsTab.TAG_ACTIVE_LIST,
-            mods=ModManager.active_mods,
-            search_text=ModsTab.active_mod_search_text,
-            status="active"
-        )
-        
-        ModsTab._render_mod_list(
+        # Рендер-поток не должен видеть списки в промежуточном состоянии
+        with dpg.mutex():
+            error_count, warning_count = ModsTab._render_status("active")
+            ModsTab._render_status("inactive")
+
+            if ModsTab._last_counts != (error_count, warning_count):
+                ModsTab._last_counts = (error_count, warning_count)
+                dpg.set_value(ModsTab.TAG_ERROR_TEXT, loc.get_string("error-count", count=error_count))
+                dpg.set_value(ModsTab.TAG_WARNING_TEXT, loc.get_string("warning-count", count=warning_count))
+
+    @staticmethod
+    def _render_status(status: str) -> Tuple[int, int]:
+        if status == "active":
+            return ModsTab._render_mod_list(
+                parent_tag=ModsTab.TAG_ACTIVE_LIST,
+                mods=ModManager.active_mods,
+                search_text=ModsTab.active_mod_search_text,
+                status="active"
+            )
+
+        return ModsTab._render_mod_list(
             parent_tag=ModsTab.TAG_INACTIVE_LIST,
             mods=ModManager.inactive_mods,
             search_text=ModsTab.inactive_mod_search_text,
             status="inactive"
         )
 
-        error_count, warning_count = ModsTab.count_mods_with_issues()
-        dpg.set_value(ModsTab.TAG_ERROR_TEXT, loc.get_string("error-count", count=error_count))
-        dpg.set_value(ModsTab.TAG_WARNING_TEXT, loc.get_string("warning-count", count=warning_count))
-
     @staticmethod
-    def _render_mod_list(parent_tag: str, mods: List[ModUnit], search_text: str, status: str):
-        dpg.delete_item(parent_tag, children_only=True)
-        
+    def _render_mod_list(
+        parent_tag: str, mods: List[ModUnit], search_text: str, status: str
+    ) -> Tuple[int, int]:
+        """Приводит список к нужному виду, пересоздавая только изменившиеся строки.
+
+        Возвращает количество модов списка с ошибками и с предупреждениями.
+        """
+        rendered = ModsTab._rendered[status]
+        order = ModsTab._rendered_order[status]
+
+        error_count = 0
+        warning_count = 0
+        visible = []
         for mod in mods:
-            if search_text and search_text not in mod.name.lower():
+            metadata = mod.metadata
+            if metadata.errors:
+                error_count += 1
+            if metadata.warnings:
+                warning_count += 1
+
+            if search_text and search_text not in mod.name_lower:
                 continue
-            
-            ModsTab._add_mod_item(mod, status, parent_tag)
+
+            visible.append(mod)
+        signatures = {mod.id: ModsTab._row_signature(mod) for mod in visible}
+
+        for mod_id, (group_tag, signature) in list(rendered.items()):
+            if signatures.get(mod_id) != signature:
+                if dpg.does_item_exist(group_tag):
+                    dpg.delete_item(group_tag)
+                ModsTab._forget_row(group_tag)
+                del rendered[mod_id]
+
+        order[:] = [mod_id for mod_id in order if mod_id in rendered]
+
+        for pos, mod in enumerate(visible):
+            if pos < len(order) and order[pos] == mod.id:
+                continue
+
+            before = rendered[order[pos]][0] if pos < len(order) else 0
+            entry = rendered.get(mod.id)
+            if entry is None:
+                group_tag = ModsTab._add_mod_item(mod, status, parent_tag, before=before)
+                rendered[mod.id] = (group_tag, signatures[mod.id])
+            else:
+                dpg.move_item(entry[0], parent=parent_tag, before=before)
+                order.remove(mod.id)
+
+            order.insert(pos, mod.id)
+
+        return error_count, warning_count
+
+    @staticmethod
+    def _row_signature(mod: ModUnit) -> Tuple:
+        meta = mod.metadata
+        return (
+            id(mod),
+            mod.name,
+            tuple(meta.errors),
+            tuple(meta.warnings),
+            meta.author_name,
+            meta.game_version,
+        )
 
     @staticmethod
-    def _add_mod_item(mod: ModUnit, status: str, parent: str):
+    def _add_mod_item(mod: ModUnit, status: str, parent: str, before: int | str = 0) -> str:
         safe_id = str(mod.id).replace(" ", "_")
         mod_group_tag = f"{safe_id}_{status}_group"
-        text_color = UIColors.DEFAULT
+        text_color = DEFAULT_COLOR
         if mod.metadata.errors:
-            text_color = UIColors.ERROR
+            text_color = ERROR_COLOR
         elif mod.metadata.warnings:
-            text_color = UIColors.WARNING
+            text_color = WARNING_COLOR
 
-        with dpg.group(tag=mod_group_tag, parent=parent):
+        with dpg.group(tag=mod_group_tag, parent=parent, before=before):
             text_item = dpg.add_text(
                 mod.name,
                 color=text_color,
                 drop_callback=ModsTab.on_mod_dropped,
                 payload_type="MOD_DRAG",
-                user_data={"mod_id": mod.id, "status": status},
+                user_data={"mod_id": mod.id, "status": status, "group": mod_group_tag},
             )
             with dpg.drag_payload(parent=text_item, payload_type="MOD_DRAG", drag_data={"mod_id": mod.id, "status": status}):
                 dpg.add_text(f"{mod.name} ({status})")
-            with dpg.tooltip(parent=text_item):
-                ModsTab._build_mini_details(mod)
-            with dpg.popup(parent=text_item, mousebutton=dpg.mvMouseButton_Right):
+
+            # Подсказка и меню появятся при первом наведении/правом клике
+            dpg.bind_item_handler_registry(text_item, ModsTab._get_row_handlers())
+
+            dpg.add_separator()
+
+        return mod_group_tag
+
+    @staticmethod
+    def _get_row_handlers() -> str:
+        """Один общий реестр обработчиков на все строки списков."""
+        if not dpg.does_item_exist(ModsTab.TAG_ROW_HANDLERS):
+            with dpg.item_handler_registry(tag=ModsTab.TAG_ROW_HANDLERS):
+                dpg.add_item_hover_handler(callback=ModsTab._on_row_hovered)
+                dpg.add_item_clicked_handler(
+                    button=dpg.mvMouseButton_Right,
+                    callback=ModsTab._on_row_right_clicked,
+                )
+
+        return ModsTab.TAG_ROW_HANDLERS
+
+    @staticmethod
+    def _on_row_hovered(sender, app_data, user_data):
+        text_item = app_data
+        row = dpg.get_item_user_data(text_item)
+        if not row or row["group"] in ModsTab._rows_with_tooltip:
+            return
+
+        mod = ModManager.get_mod_by_id(row["mod_id"])
+        if mod is None:
+            return
+
+        with dpg.tooltip(parent=text_item):
+            ModsTab._build_mini_details(mod)
+
+        ModsTab._rows_with_tooltip.add(row["group"])
+
+    @staticmethod
+    def _on_row_right_clicked(sender, app_data, user_data):
+        text_item = app_data[1]
+        row = dpg.get_item_user_data(text_item)
+        if not row:
+            return
+
+        popup = ModsTab._row_popups.get(row["group"])
+        if popup is None:
+            mod = ModManager.get_mod_by_id(row["mod_id"])
+            if mod is None:
+                return
+
+            with dpg.window(popup=True, show=False, autosize=True) as popup:
                 dpg.add_button(
-                    label=loc.get_string("btn-show-full-details"),
-                    callback=lambda: ModsTab.show_details_window(mod),
+                    label=ModsTab._label("btn-show-full-details"),
+                    callback=ModsTab._on_show_details_clicked,
+                    user_data=mod.id,
                 )
-            
-            dpg.add_separator()
+
+            ModsTab._row_popups[row["group"]] = popup
+
+        dpg.configure_item(popup, show=True)
+
+    @staticmethod
+    def _on_show_details_clicked(sender, app_data, user_data):
+        mod = ModManager.get_mod_by_id(user_data)
+        if mod is not None:
+            ModsTab.show_details_window(mod)
+
+    @staticmethod
+    def _forget_row(group_tag: str):
+        ModsTab._rows_with_tooltip.discard(group_tag)
+        popup = ModsTab._row_popups.pop(group_tag, None)
+        if popup is not None and dpg.does_item_exist(popup):
+            dpg.delete_item(popup)
+
+    @staticmethod
+    def _label(key: str) -> str:
+        label = ModsTab._labels.get(key)
+        if label is None:
+            label = ModsTab._labels[key] = loc.get_string(key)
+
+        return label
 
     @staticmethod
     def _build_mini_details(mod: ModUnit):
-        def _row(label_key, value, color=UIColors.DEFAULT):
+        def _row(label_key, value, color=DEFAULT_COLOR):
             with dpg.group(horizontal=True):
-                dpg.add_text(loc.get_string(label_key), color=UIColors.LABEL)
+                dpg.add_text(ModsTab._label(label_key), color=LABEL_COLOR)
                 dpg.add_text(str(value), color=color)
 
-        _row("label-author", mod.metadata.author_name, UIColors.AUTHOR)
-        _row("label-game-version", mod.metadata.game_version, UIColors.VERSION)
+        _row("label-author", mod.metadata.author_name, AUTHOR_COLOR)
+        _row("label-game-version", mod.metadata.game_version, VERSION_COLOR)
         
         if mod.metadata.errors:
             dpg.add_separator()
-            dpg.add_text(loc.get_string("label-errors"), color=UIColors.ERROR)
+            dpg.add_text(ModsTab._label("label-errors"), color=ERROR_COLOR)
             for err in mod.metadata.errors[:2]:
                 dpg.add_text(f"- {err}", wrap=400)
             if len(mod.metadata.errors) > 2:
-                dpg.add_text("...", color=UIColors.LABEL)
+                dpg.add_text("...", color=LABEL_COLOR)
 
     @staticmethod
     def show_details_window(mod: ModUnit):
@@ -345,34 +515,34 @@ class ModsTab:
             on_close=lambda: dpg.delete_item(window_tag),
         ):
             with dpg.group():
-                ModsTab._details_row("label-mod-name", mod.name, UIColors.AUTHOR)
-                ModsTab._details_row("label-modloader-id", mod.id, UIColors.VERSION)
+                ModsTab._details_row("label-mod-name", mod.name, AUTHOR_COLOR)
+                ModsTab._details_row("label-modloader-id", mod.id, VERSION_COLOR)
                 ModsTab._details_row("label-author", mod.metadata.author_name)
-                ModsTab._details_row("label-is-local-mod", loc.get_string("base-yes") if mod.local else loc.get_string("base-no"))
+                ModsTab._details_row("label-is-local-mod", ModsTab._label("base-yes") if mod.local else ModsTab._label("base-no"))
             
             dpg.add_separator()
 
             if mod.metadata.errors:
-                dpg.add_text(loc.get_string("label-errors"), color=UIColors.ERROR)
+                dpg.add_text(ModsTab._label("label-errors"), color=ERROR_COLOR)
                 for err in mod.metadata.errors:
                     dpg.add_text(f"• {err}", wrap=0)
                 dpg.add_separator()
 
             if mod.metadata.warnings:
-                dpg.add_text(loc.get_string("label-warnings"), color=UIColors.WARNING)
+                dpg.add_text(ModsTab._label("label-warnings"), color=WARNING_COLOR)
                 for warn in mod.metadata.warnings:
                     dpg.add_text(f"• {warn}", wrap=0)
                 dpg.add_separator()
 
             if mod.metadata.dependencies:
-                dpg.add_text("Dependencies:", color=UIColors.LABEL)
+                dpg.add_text("Dependencies:", color=LABEL_COLOR)
                 for dep in mod.metadata.dependencies:
                     dpg.add_text(f"• {dep.type}: {dep.id} (Optional: {dep.condition is not None})")
 
     @staticmethod
-    def _details_row(label_key: str, value: str, val_color=UIColors.VALUE):
+    def _details_row(label_key: str, value: str, val_color=VALUE_COLOR):
         with dpg.group(horizontal=True):
-            dpg.add_text(loc.get_string(label_key), color=UIColors.LABEL)
+            dpg.add_text(ModsTab._label(label_key), color=LABEL_COLOR)
             dpg.add_text(str(value), color=val_color)
 
 
@@ -412,11 +582,12 @@ class ModsTab:
             if not is_container_drop and drag_id == target_id:
                 return
 
+            moved_between_lists = False
             if drag_status != target_status:
                 if target_status == "active":
-                    ModManager.activate_mod(drag_id)
+                    moved_between_lists = ModManager.activate_mod(drag_id)
                 else:
-                    ModManager.deactivate_mod(drag_id)
+                    moved_between_lists = ModManager.deactivate_mod(drag_id)
                 drag_status = target_status
 
             if drag_status == "active":
@@ -430,30 +601,21 @@ class ModsTab:
                     ModManager.move_inactive_mod_to_end(drag_id)
                 elif target_id and target_id != drag_id:
                     ModManager.swap_inactive_mods(drag_id, target_id)
-            ModsTab.render_mods()
+
+            if moved_between_lists:
+                ModsTab.render_mods()
+            else:
+                # Перестановка внутри списка: второй список и счётчики не меняются
+                with dpg.mutex():
+                    ModsTab._render_status(drag_status)
 
         except Exception as e:
             logger.error(f"Error in Drag&Drop: {e}", exc_info=True)
 
-    @staticmethod
-    def count_mods_with_issues() -> Tuple[int, int]:
-        error_count = 0
-        warning_count = 0
-        for mod in ModManager.active_mods:
-            if mod.metadata.errors:
-                error_count += 1
-            if mod.metadata.warnings:
-                warning_count += 1
-        return error_count, warning_count
-
     @staticmethod
     def _dispatch_ui_update(callback, *args, **kwargs):
-
-        if App and hasattr(App, "ui_tasks_queue"):
-            App.ui_tasks_queue.put(lambda: callback(*args, **kwargs))
-        else:
-            logging.warning("App.ui_tasks_queue not found, executing UI update directly from thread.")
-            callback(*args, **kwargs)
+        # Виджеты меняются только из главного потока, в цикле App.run
+        App.call_in_ui(callback, *args, **kwargs)
 
     @staticmethod
     def on_preset_selected(sender, app_data):
@@ -3,7 +3,30 @@ import json
 import logging
 import platform
 from pathlib import Path
-from typing import Any, Dict, Final, Optional
+from typing import Any, Dict, Final, FrozenSet, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_SYSTEM = platform.system()
+_HOME = Path.home()
+_WORKSHOP_SUBPATH = Path(
+    "Daedalic Entertainment GmbH", "Barotrauma", "WorkshopMods", "Installed"
+)
+
+# Пути зависят только от ОС, поэтому считаются один раз при импорте
+_USER_DATA_PATHS: Dict[str, Path] = {
+    "Windows": _HOME / "AppData" / "Roaming" / "BarotraumaModdingTool",
+    "Linux": _HOME / ".config" / "BarotraumaModdingTool",
+    "Darwin": _HOME / "Library" / "Application Support" / "BarotraumaModdingTool",
+}
+_STEAM_MOD_PATHS: Dict[str, Path] = {
+    "Windows": _HOME / "AppData" / "Local" / _WORKSHOP_SUBPATH,
+    "Linux": _HOME / ".local" / "share" / _WORKSHOP_SUBPATH,
+    "Darwin": _HOME / "Library" / "Application Support" / _WORKSHOP_SUBPATH,
+}
 
 
 class AppConfig:
@@ -14,36 +37,25 @@ class AppConfig:
     _data_root: Path = _root / "Data"
     _user_data_path: Path = Path()
 
-    xml_system_dirs = [
-        "filelist.xml",
-        "metadata.xml",
-        "modparts.xml",
-        "file_list.xml",
-        "files_list.xml",
-        "runconfig.xml",
-    ]
+    # Служебные XML мода; имена в нижнем регистре, сравнивать с name.lower()
+    xml_system_dirs: FrozenSet[str] = frozenset(
+        {
+            "filelist.xml",
+            "metadata.xml",
+            "modparts.xml",
+            "file_list.xml",
+            "files_list.xml",
+            "runconfig.xml",
+        }
+    )
 
     @classmethod
     def init(cls, debug=False) -> None:
-        if platform.system() == "Windows":
-            cls._user_data_path = (
-                Path.home() / "AppData" / "Roaming" / "BarotraumaModdingTool"
-            )
-
-        elif platform.system() == "Linux":
-            cls._user_data_path = Path.home() / ".config" / "BarotraumaModdingTool"
-
-        elif platform.system() == "Darwin":
-            cls._user_data_path = (
-                Path.home()
-                / "Library"
-                / "Application Support"
-                / "BarotraumaModdingTool"
-            )
-
-        else:
+        user_data_path = _USER_DATA_PATHS.get(_SYSTEM)
+        if user_data_path is None:
             raise RuntimeError("Unknown operating system")
 
+        cls._user_data_path = user_data_path
         cls._user_data_path.mkdir(parents=True, exist_ok=True)
         cls._load_user_config()
         cls.set("debug", debug)
@@ -55,8 +67,8 @@ class AppConfig:
 
         if config_path.exists():
             try:
-                with open(config_path, "r", encoding="utf-8") as file:
-                    cls.user_config = json.load(file)
+                raw = config_path.read_bytes()
+                cls.user_config = orjson.loads(raw) if orjson else json.loads(raw)
 
             except json.JSONDecodeError as err:
                 logging.error(f"Error while decoding user_config.json: {err}")
@@ -66,6 +78,14 @@ class AppConfig:
         config_path = cls._user_data_path / "config.json"
         cls.user_config.pop("debug")
 
+        if orjson:
+            config_path.write_bytes(
+                orjson.dumps(
+                    cls.user_config, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2
+                )
+            )
+            return
+
         with open(config_path, "w", encoding="utf-8") as file:
             json.dump(cls.user_config, file, indent=4, sort_keys=True)
 
@@ -116,40 +136,8 @@ class AppConfig:
 
     @classmethod
     def set_steam_mods_path(cls) -> None:
-        if platform.system() == "Windows":
-            path_to_mod = (
-                Path.home()
-                / "AppData"
-                / "Local"
-                / "Daedalic Entertainment GmbH"
-                / "Barotrauma"
-                / "WorkshopMods"
-                / "Installed"
-            )
-
-        elif platform.system() == "Linux":
-            path_to_mod = (
-                Path.home()
-                / ".local"
-                / "share"
-                / "Daedalic Entertainment GmbH"
-                / "Barotrauma"
-                / "WorkshopMods"
-                / "Installed"
-            )
-
-        elif platform.system() == "Darwin":
-            path_to_mod = (
-                Path.home()
-                / "Library"
-                / "Application Support"
-                / "Daedalic Entertainment GmbH"
-                / "Barotrauma"
-                / "WorkshopMods"
-                / "Installed"
-            )
-
-        else:
+        path_to_mod = _STEAM_MOD_PATHS.get(_SYSTEM)
+        if path_to_mod is None:
             raise RuntimeError("Unknown operating system")
 
         AppConfig.set("steam_mod_dir", str(path_to_mod))
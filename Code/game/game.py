@@ -9,7 +9,6 @@ from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import List
 import shutil
-import requests
 
 from Code.app_vars import AppConfig
 
@@ -38,6 +37,15 @@ class Game:
         ),
     }
 
+    @staticmethod
+    def is_game_dir(path: Path) -> bool:
+        """Есть ли в папке исполняемый файл Barotrauma для текущей ОС."""
+        exec_file = Game._EXECUTABLES.get(platform.system())
+        if exec_file is None:
+            return False
+
+        return (path / exec_file).exists()
+
     @staticmethod
     def run_game(install_lua: bool = False, skip_intro: bool = False):
         if install_lua:
@@ -61,8 +69,10 @@ class Game:
 
         updater_path = game_path / exec_file
 
+        import requests
+
         try:
-            response = requests.get(url, stream=True)
+            response = requests.get(url, stream=True, timeout=(5, 30))
             response.raise_for_status()
             # total_size = int(response.headers.get("Content-Length", 0))
             downloaded_size = 0
@@ -1,20 +1,36 @@
+import atexit
 import hashlib
+import json
 import logging
-import pickle
+import os
 from pathlib import Path
 from typing import Dict, Optional, Tuple, Any
 
-# Импортируем ModUnit, чтобы pickle знал этот класс при загрузке
 from Code.package.dataclasses import ModUnit
 from Code.app_vars import AppConfig
 
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 class CacheManager:
-    _cache_file = Path("mod_cache.pkl")
-    # Структура кэша: { "absolute_path_to_mod": ( "combined_hash", ModUnitObject ) }
-    _cache_data: Dict[str, Tuple[str, ModUnit]] = {}
+    _cache_file = Path("mod_cache.json")
+    # Увеличивать при изменении формата записей
+    CACHE_VERSION = 2
+    # Пути модов приходят из ModManager.load_mods уже абсолютными
+    # Структура кэша: { "absolute_path_to_mod": ( stat_tuple, "combined_hash", ModUnitObject ) }
+    _cache_data: Dict[str, Tuple[Tuple[int, ...], str, ModUnit]] = {}
     _is_dirty = False
+    # Список критических файлов, влияющих на структуру мода
+    _files_to_check = ("filelist.xml", "metadata.xml")
 
     @staticmethod
     def init():
@@ -22,16 +38,32 @@ class CacheManager:
         # Можно положить кэш в папку конфигов, чтобы не мусорить в корне
         cache_dir = AppConfig.get_data_root_path() # Или другая папка
         if cache_dir:
-            CacheManager._cache_file = cache_dir / "mod_cache.pkl"
+            CacheManager._cache_file = cache_dir / "mod_cache.json"
 
-        if CacheManager._cache_file.exists():
-            try:
-                with open(CacheManager._cache_file, "rb") as f:
-                    CacheManager._cache_data = pickle.load(f)
-                logger.info(f"Loaded cache with {len(CacheManager._cache_data)} mods.")
-            except Exception as e:
-                logger.warning(f"Failed to load cache (it might be corrupt or outdated): {e}")
-                CacheManager._cache_data = {}
+        # Несохранённые изменения (например, после перезагрузки модов) пишем при выходе
+        atexit.register(CacheManager.save)
+
+        try:
+            raw = CacheManager._cache_file.read_bytes()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Failed to read cache: {e}")
+            return
+
+        try:
+            data = orjson.loads(raw) if orjson else json.loads(raw)
+            if data.get("version") != CacheManager.CACHE_VERSION:
+                raise ValueError(f"unsupported cache version {data.get('version')!r}")
+
+            CacheManager._cache_data = {
+                key: (tuple(stat), mod_hash, ModUnit.from_dict(mod_data))
+                for key, (stat, mod_hash, mod_data) in data["mods"].items()
+            }
+            logger.info(f"Loaded cache with {len(CacheManager._cache_data)} mods.")
+        except Exception as e:
+            logger.warning(f"Failed to load cache (it might be corrupt or outdated): {e}")
+            CacheManager._cache_data = {}
 
     @staticmethod
     def save():
@@ -39,9 +71,24 @@ class CacheManager:
         if not CacheManager._is_dirty:
             return
 
+        data = {
+            "version": CacheManager.CACHE_VERSION,
+            "mods": {
+                key: (stat, mod_hash, mod.to_dict())
+                for key, (stat, mod_hash, mod) in CacheManager._cache_data.items()
+            },
+        }
+
         try:
-            with open(CacheManager._cache_file, "wb") as f:
-                pickle.dump(CacheManager._cache_data, f)
+            if orjson:
+                raw = orjson.dumps(data)
+            else:
+                raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+            # Пишем во временный файл и подменяем, чтобы сбой не оставил полкэша
+            tmp_file = CacheManager._cache_file.with_suffix(".json.tmp")
+            tmp_file.write_bytes(raw)
+            os.replace(tmp_file, CacheManager._cache_file)
             logger.info("Cache saved to disk.")
             CacheManager._is_dirty = False
         except Exception as e:
@@ -53,18 +100,24 @@ class CacheManager:
         Возвращает ModUnit, если хеш файлов совпадает.
         Иначе возвращает None.
         """
-        path_key = str(mod_path.resolve())
+        path_key = os.fspath(mod_path)
         cached_entry = CacheManager._cache_data.get(path_key)
 
         if not cached_entry:
             return None
 
-        cached_hash, mod_unit = cached_entry
-        current_hash = CacheManager._compute_mod_hash(mod_path)
+        cached_stat, cached_hash, mod_unit = cached_entry
+        current_stat = CacheManager._compute_mod_stat(mod_path)
+        if current_stat == cached_stat:
+            return mod_unit
 
+        current_hash = CacheManager._compute_mod_hash(mod_path)
         if current_hash == cached_hash:
+            # Файлы тронуты, но содержимое то же: обновляем отпечаток
+            CacheManager._cache_data[path_key] = (current_stat, cached_hash, mod_unit)
+            CacheManager._is_dirty = True
             return mod_unit
-        
+
         return None
 
     @staticmethod
@@ -73,34 +126,46 @@ class CacheManager:
         if not mod or not mod.path:
             return
 
-        path_key = str(mod.path.resolve())
+        path_key = os.fspath(mod.path)
+        current_stat = CacheManager._compute_mod_stat(mod.path)
         current_hash = CacheManager._compute_mod_hash(mod.path)
-        
-        CacheManager._cache_data[path_key] = (current_hash, mod)
+
+        CacheManager._cache_data[path_key] = (current_stat, current_hash, mod)
         CacheManager._is_dirty = True
 
+    @staticmethod
+    def _compute_mod_stat(mod_path: Path) -> Tuple[int, ...]:
+        """
+        Быстрый отпечаток (dev, ino, mtime_ns, size) для filelist.xml и metadata.xml.
+        Если он не изменился, хеш содержимого можно не считать. dev/ino ловят
+        подмену файла целиком (распаковка, синхронизация) с сохранённым mtime.
+        """
+        result = []
+        for filename in CacheManager._files_to_check:
+            try:
+                st = os.stat(os.path.join(mod_path, filename))
+                result.extend((st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size))
+            except OSError:
+                result.extend((-1, -1, -1, -1))
+
+        return tuple(result)
+
     @staticmethod
     def _compute_mod_hash(mod_path: Path) -> str:
         """
-        Считает MD5 от filelist.xml и metadata.xml.
+        Считает хеш от filelist.xml и metadata.xml.
         Чтение файлов намного быстрее парсинга XML и обхода директорий.
+        Хеш служит только признаком изменений, криптостойкость не нужна.
         """
-        hasher = hashlib.md5()
-        
-        # Список критических файлов, влияющих на структуру мода
-        files_to_check = ["filelist.xml", "metadata.xml"]
-        
-        for filename in files_to_check:
-            f_path = mod_path / filename
-            if f_path.exists():
-                try:
-                    # Читаем небольшими блоками, чтобы не забивать память
-                    with open(f_path, "rb") as f:
-                        for chunk in iter(lambda: f.read(4096), b""):
-                            hasher.update(chunk)
-                except OSError:
-                    pass
-        
+        hasher = blake3.blake3() if blake3 else hashlib.blake2b(digest_size=16)
+
+        for filename in CacheManager._files_to_check:
+            try:
+                # Файлы небольшие, читаем целиком за один вызов
+                hasher.update((mod_path / filename).read_bytes())
+            except OSError:
+                pass
+
         return hasher.hexdigest()
 
     @staticmethod
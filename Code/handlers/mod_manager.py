@@ -1,8 +1,9 @@
 import atexit
 import logging
+import mmap
 import os
 from collections import defaultdict, deque
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
@@ -22,6 +23,16 @@ class ModManager:
     inactive_mods: List[ModUnit] = []
     _mod_map: Dict[str, ModUnit] = {}
     _game_path_cache: Optional[Path] = None
+    # Позиции модов в списках: {status: {mod_id: index}}, None — перестроить при обращении
+    _positions: Dict[str, Optional[Dict[str, int]]] = {"active": None, "inactive": None}
+    # Индексы по имени для пресетов: (локальные моды, все моды); None — построить заново
+    _name_index: Optional[Tuple[Dict[str, ModUnit], Dict[str, ModUnit]]] = None
+    # Разобранный config_player.xml: ((путь, st_mtime_ns, st_size), объект)
+    _xml_obj_cached: Optional[Tuple[Tuple[str, int, int], XMLElement]] = None
+    # Порядок активных модов на момент последнего save_mods; None — не сохранялся
+    _saved_signature: Optional[Tuple[Tuple[str, str], ...]] = None
+    # С какого числа активных модов process_errors перечитывает метаданные в пуле
+    PARALLEL_META_THRESHOLD = 32
 
     @staticmethod
     def get_game_path() -> Optional[Path]:
@@ -42,13 +53,14 @@ class ModManager:
     @staticmethod
     def _parse_mod_safe(path: Path) -> Optional[ModUnit]:
         try:
-            if not (path / "filelist.xml").exists():
-                return None
-
+            # Для закэшированного мода наличие filelist.xml уже проверено его stat-отпечатком
             cached_mod = CacheManager.get_cached_mod(path)
             if cached_mod:
                 return cached_mod
 
+            if not (path / "filelist.xml").exists():
+                return None
+
             mod = ModUnit.build(path)
         
             if mod:
@@ -85,6 +97,21 @@ class ModManager:
             if f.is_file()
         ])
 
+    @staticmethod
+    def _get_name_index() -> Tuple[Dict[str, ModUnit], Dict[str, ModUnit]]:
+        if ModManager._name_index is None:
+            local_mods_by_name: Dict[str, ModUnit] = {}
+            mods_by_name: Dict[str, ModUnit] = {}
+            for mod in ModManager._mod_map.values():
+                if mod.local:
+                    local_mods_by_name[mod.name] = mod
+                # Как и прежний линейный поиск, берём первый мод с таким именем
+                mods_by_name.setdefault(mod.name, mod)
+
+            ModManager._name_index = (local_mods_by_name, mods_by_name)
+
+        return ModManager._name_index
+
     @staticmethod
     def load_preset(preset_name: str) -> Tuple[bool, List[str]]:
         p_dir = ModManager.get_presets_dir()
@@ -100,14 +127,13 @@ class ModManager:
             return False, []
 
         new_active_mods = []
+        seen_ids: Set[str] = set()
         missing_mods = []
         
-        local_mods_by_name = {
-            m.name: m for m in ModManager._mod_map.values() if m.local
-        }
+        local_mods_by_name, mods_by_name = ModManager._get_name_index()
 
         for node in xml_obj.iter_non_comment_childrens():
-            tag = node.tag.lower()
+            tag = node.tag_lower
             mod_to_add = None
             
             if tag == "vanilla":
@@ -123,24 +149,22 @@ class ModManager:
             
             elif tag == "local":
                 l_name = node.attributes.get("name")
-                mod_to_add = local_mods_by_name.get(l_name)
-                if not mod_to_add:
-                    mod_to_add = next((m for m in ModManager._mod_map.values() if m.name == l_name), None)
+                mod_to_add = local_mods_by_name.get(l_name) or mods_by_name.get(l_name)
                 
                 if not mod_to_add:
                     missing_mods.append(l_name)
 
-            if mod_to_add:
-                if mod_to_add not in new_active_mods:
-                    new_active_mods.append(mod_to_add)
+            if mod_to_add and mod_to_add.id not in seen_ids:
+                seen_ids.add(mod_to_add.id)
+                new_active_mods.append(mod_to_add)
 
         ModManager.active_mods = new_active_mods
         
-        active_ids = {m.id for m in new_active_mods}
         ModManager.inactive_mods = [
             m for m in ModManager._mod_map.values() 
-            if m.id not in active_ids
+            if m.id not in seen_ids
         ]
+        ModManager._invalidate_positions()
         
         for i, mod in enumerate(ModManager.active_mods, 1):
             mod.load_order = i
@@ -184,6 +208,7 @@ class ModManager:
         ModManager.active_mods.clear()
         ModManager.inactive_mods.clear()
         ModManager._mod_map.clear()
+        ModManager._name_index = None
 
         config_player = game_path / "config_player.xml"
         active_mod_configs = ModManager._get_active_mod_configs(config_player)
@@ -199,61 +224,47 @@ class ModManager:
 
         for p in paths_to_check:
             if p and p.name and p.exists():
+                # Абсолютный путь один раз здесь: дальше он служит ключом кэша как есть
+                p = Path(os.path.abspath(p))
                 try:
-                    for item in p.iterdir():
-                        if item.is_dir() and not item.name.startswith('.') and item not in seen_paths:
-                            mod_folders_to_process.append(item)
-                            seen_paths.add(item)
+                    # DirEntry.is_dir() берёт тип из readdir без отдельного stat
+                    with os.scandir(p) as it:
+                        for entry in it:
+                            if entry.name.startswith('.') or not entry.is_dir():
+                                continue
+
+                            item = Path(entry.path)
+                            if item not in seen_paths:
+                                mod_folders_to_process.append(item)
+                                seen_paths.add(item)
                 except OSError:
                     continue
 
         max_workers = min(32, (os.cpu_count() or 4) * 4)
-        loaded_mods_raw = []
+        # Результат кладётся в слот своей папки: порядок модов не зависит от
+        # того, в каком порядке потоки закончили разбор
+        loaded_mods_raw: List[Optional[ModUnit]] = [None] * len(mod_folders_to_process)
         
         if mod_folders_to_process:
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                results = list(executor.map(ModManager._parse_mod_safe, mod_folders_to_process))
-                for mod in results:
-                    if mod:
-                        loaded_mods_raw.append(mod)
+                futures = {
+                    executor.submit(ModManager._parse_mod_safe, folder): i
+                    for i, folder in enumerate(mod_folders_to_process)
+                }
+                for future in as_completed(futures):
+                    loaded_mods_raw[futures[future]] = future.result()
 
         CacheManager.save()
 
         grouped_by_name: Dict[str, List[ModUnit]] = defaultdict(list)
         for mod in loaded_mods_raw:
-            grouped_by_name[mod.name].append(mod)
-
-        unique_mods_list = []
-
-        for name, group in grouped_by_name.items():
-            if len(group) == 1:
-                unique_mods_list.append(group[0])
-                continue
-            
-            
-            mods_with_steam = [m for m in group if m.steam_id]
-            mods_without_steam = [m for m in group if not m.steam_id]
-            
-            selected_mod = None
-
-            if mods_with_steam and mods_without_steam:
-                selected_mod = mods_with_steam[0]
-            
-            elif len(mods_with_steam) > 1:
-                locals = [m for m in mods_with_steam if m.local]
-                if locals:
-                    selected_mod = locals[0]
-                else:
-                    selected_mod = mods_with_steam[0]
-            else:
-
-                selected_mod = group[0]
-
-            if selected_mod:
-                unique_mods_list.append(selected_mod)
+            if mod:
+                grouped_by_name[mod.name].append(mod)
 
-        for mod in unique_mods_list:
+        for group in grouped_by_name.values():
+            mod = group[0] if len(group) == 1 else ModManager._pick_best(group)
             ModManager._mod_map[mod.id] = mod
+        ModManager._name_index = None
 
         for mod in ModManager._mod_map.values():
             if mod.id in active_mod_configs:
@@ -263,34 +274,55 @@ class ModManager:
                 ModManager.inactive_mods.append(mod)
 
         ModManager.active_mods.sort(key=lambda m: m.load_order if m.load_order is not None else 9999)
+        ModManager._invalidate_positions()
 
     @staticmethod
-    def _get_active_mod_configs(path_to_config: Path) -> Dict[str, int]:
-        if not path_to_config.exists():
-            return {}
+    def _pick_best(group: List[ModUnit]) -> ModUnit:
+        """Выбирает один мод из нескольких с одинаковым именем.
 
-        xml_obj = XMLBuilder.load(path_to_config)
+        Предпочтение моду со Steam ID, среди них — локальной копии; при равенстве
+        побеждает найденный раньше.
+        """
+        return max(group, key=lambda m: (bool(m.steam_id), m.local))
+
+    @staticmethod
+    def _get_active_mod_configs(path_to_config: Path) -> Dict[str, int]:
+        xml_obj = ModManager._load_user_config(path_to_config)
         if not xml_obj:
             return {}
 
         active_configs = {}
-        packages = list(xml_obj.find_only_elements("package"))
+        reg_pkg_node = ModManager._find_regularpackages(xml_obj)
+        packages = reg_pkg_node.children_by_tag("package") if reg_pkg_node else []
         
         for i, pkg in enumerate(packages, start=1):
             path_attr = pkg.attributes.get("path")
             if not path_attr:
                 continue
             
-            try:
-                parts = path_attr.replace('\\', '/').split('/')
-                if len(parts) >= 2:
-                    mod_id = parts[-2]
-                    active_configs[mod_id] = i
-            except Exception:
-                continue
+            # Имя папки мода — предпоследний компонент пути к filelist.xml
+            head, sep, _ = path_attr.replace('\\', '/').rpartition('/')
+            if sep:
+                active_configs[head.rpartition('/')[2]] = i
 
         return active_configs
 
+    @staticmethod
+    def _find_regularpackages(xml_obj: XMLElement) -> Optional[XMLElement]:
+        """Находит узел regularpackages в config_player.xml.
+
+        Обычно это config > contentpackages > regularpackages, либо узел,
+        добавленный save_mods прямо в корень; полный обход — запасной путь.
+        """
+        for node in xml_obj.children_by_tag("regularpackages"):
+            return node
+
+        for content_packages in xml_obj.children_by_tag("contentpackages"):
+            for node in content_packages.children_by_tag("regularpackages"):
+                return node
+
+        return next(xml_obj.find_only_elements("regularpackages"), None)
+
     @staticmethod
     def load_cslua_config():
         game_path = ModManager.get_game_path()
@@ -299,12 +331,15 @@ class ModManager:
 
         lua_path = game_path / "Barotrauma.deps.json"
         has_lua = False
-        if lua_path.exists():
-            try:
-                content = lua_path.read_text(encoding="utf-8")
-                has_lua = "Luatrauma" in content
-            except Exception:
-                pass
+        try:
+            # Файл весит мегабайты, а нужен лишь факт вхождения: ищем по байтам
+            # в отображённой памяти, поиск останавливается на первом совпадении
+            with open(lua_path, "rb") as file, mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as content:
+                has_lua = content.find(b"Luatrauma") != -1
+        except (OSError, ValueError):
+            pass
         
         AppConfig.set("has_lua", has_lua)
         if has_lua:
@@ -333,28 +368,79 @@ class ModManager:
     find_mod_by_id = get_mod_by_id
 
     @staticmethod
-    def activate_mod(mod_id: str) -> bool:
-        mod = ModManager._mod_map.get(mod_id)
-        if not mod:
-            return False
-            
-        if mod in ModManager.inactive_mods:
-            ModManager.inactive_mods.remove(mod)
-            ModManager.active_mods.append(mod)
-            return True
-        return False
+    def _get_list(status: str) -> List[ModUnit]:
+        return ModManager.active_mods if status == "active" else ModManager.inactive_mods
 
     @staticmethod
-    def deactivate_mod(mod_id: str) -> bool:
-        mod = ModManager._mod_map.get(mod_id)
-        if not mod:
+    def _invalidate_positions(status: Optional[str] = None) -> None:
+        if status is None:
+            ModManager._positions = {"active": None, "inactive": None}
+        else:
+            ModManager._positions[status] = None
+
+    @staticmethod
+    def _index_of(status: str, mod_id: str) -> int:
+        """Позиция мода в списке status или -1. Индекс перестраивается только после
+        изменений, сдвигающих элементы (удаление, сортировка, замена списка)."""
+        mods = ModManager._get_list(status)
+        positions = ModManager._positions[status]
+        if positions is not None:
+            idx = positions.get(mod_id)
+            if idx is None:
+                return -1
+            if idx < len(mods) and mods[idx].id == mod_id:
+                return idx
+
+        positions = {mod.id: i for i, mod in enumerate(mods)}
+        ModManager._positions[status] = positions
+        return positions.get(mod_id, -1)
+
+    @staticmethod
+    def _transfer_mod(mod_id: str, source: str, target: str) -> bool:
+        idx = ModManager._index_of(source, mod_id)
+        if idx == -1:
             return False
 
-        if mod in ModManager.active_mods:
-            ModManager.active_mods.remove(mod)
-            ModManager.inactive_mods.append(mod)
-            return True
-        return False
+        mod = ModManager._get_list(source).pop(idx)
+        ModManager._invalidate_positions(source)
+
+        target_list = ModManager._get_list(target)
+        target_list.append(mod)
+        positions = ModManager._positions[target]
+        if positions is not None:
+            positions[mod.id] = len(target_list) - 1
+        return True
+
+    @staticmethod
+    def _swap_mods(status: str, mod_id1: str, mod_id2: str) -> None:
+        idx1 = ModManager._index_of(status, mod_id1)
+        idx2 = ModManager._index_of(status, mod_id2)
+        if idx1 == -1 or idx2 == -1:
+            return
+
+        mods = ModManager._get_list(status)
+        mods[idx1], mods[idx2] = mods[idx2], mods[idx1]
+        positions = ModManager._positions[status]
+        if positions is not None:
+            positions[mod_id1], positions[mod_id2] = idx2, idx1
+
+    @staticmethod
+    def _move_mod_to_end(status: str, mod_id: str) -> None:
+        idx = ModManager._index_of(status, mod_id)
+        if idx == -1:
+            return
+
+        mods = ModManager._get_list(status)
+        mods.append(mods.pop(idx))
+        ModManager._invalidate_positions(status)
+
+    @staticmethod
+    def activate_mod(mod_id: str) -> bool:
+        return ModManager._transfer_mod(mod_id, "inactive", "active")
+
+    @staticmethod
+    def deactivate_mod(mod_id: str) -> bool:
+        return ModManager._transfer_mod(mod_id, "active", "inactive")
         
     @staticmethod
     def activate_all_mods():
@@ -362,57 +448,79 @@ class ModManager:
             return
         ModManager.active_mods.extend(ModManager.inactive_mods)
         ModManager.inactive_mods.clear()
+        ModManager._invalidate_positions()
         logger.info("all mods active")
 
     @staticmethod
     def swap_active_mods(mod_id1: str, mod_id2: str) -> None:
-        if mod_id1 not in ModManager._mod_map or mod_id2 not in ModManager._mod_map:
-            return
-        
-        try:
-            idx1 = -1
-            idx2 = -1
-            for i, m in enumerate(ModManager.active_mods):
-                if m.id == mod_id1: idx1 = i
-                elif m.id == mod_id2: idx2 = i
-                
-                if idx1 != -1 and idx2 != -1:
-                    break
-            
-            if idx1 != -1 and idx2 != -1:
-                ModManager.active_mods[idx1], ModManager.active_mods[idx2] = (
-                    ModManager.active_mods[idx2],
-                    ModManager.active_mods[idx1],
-                )
-        except Exception:
-            pass
+        ModManager._swap_mods("active", mod_id1, mod_id2)
 
     @staticmethod
     def swap_inactive_mods(mod_id1: str, mod_id2: str) -> None:
-        try:
-            m1 = ModManager.get_mod_by_id(mod_id1)
-            m2 = ModManager.get_mod_by_id(mod_id2)
-            if m1 and m2 and m1 in ModManager.inactive_mods and m2 in ModManager.inactive_mods:
-                idx1 = ModManager.inactive_mods.index(m1)
-                idx2 = ModManager.inactive_mods.index(m2)
-                ModManager.inactive_mods[idx1], ModManager.inactive_mods[idx2] = \
-                    ModManager.inactive_mods[idx2], ModManager.inactive_mods[idx1]
-        except ValueError:
-            pass
+        ModManager._swap_mods("inactive", mod_id1, mod_id2)
 
     @staticmethod
     def move_active_mod_to_end(mod_id: str) -> None:
-        mod = ModManager.get_mod_by_id(mod_id)
-        if mod and mod in ModManager.active_mods:
-            ModManager.active_mods.remove(mod)
-            ModManager.active_mods.append(mod)
+        ModManager._move_mod_to_end("active", mod_id)
 
     @staticmethod
     def move_inactive_mod_to_end(mod_id: str) -> None:
-        mod = ModManager.get_mod_by_id(mod_id)
-        if mod and mod in ModManager.inactive_mods:
-            ModManager.inactive_mods.remove(mod)
-            ModManager.inactive_mods.append(mod)
+        ModManager._move_mod_to_end("inactive", mod_id)
+
+    @staticmethod
+    def _active_signature() -> Tuple[Tuple[str, str], ...]:
+        return tuple((mod.name, mod.str_path) for mod in ModManager.active_mods)
+
+    @staticmethod
+    def _load_user_config(user_config_path: Path) -> Optional[XMLElement]:
+        """Загружает config_player.xml, переиспользуя разобранный ранее объект.
+
+        Объект берётся из памяти, пока путь и stat файла совпадают с записанными
+        при последней загрузке или сохранении, иначе файл разбирается заново.
+        Используется при загрузке модов, в save_mods и при выходе.
+        """
+        try:
+            st = os.stat(user_config_path)
+        except OSError:
+            return None
+
+        stamp = (os.fspath(user_config_path), st.st_mtime_ns, st.st_size)
+        cached = ModManager._xml_obj_cached
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        xml_obj = XMLBuilder.load(user_config_path)
+        ModManager._xml_obj_cached = (stamp, xml_obj) if xml_obj else None
+        return xml_obj
+
+    @staticmethod
+    def _write_user_config(xml_obj: XMLElement, user_config_path: Path) -> None:
+        temp_path = user_config_path.with_suffix(".tmp")
+        XMLBuilder.save(xml_obj, temp_path)
+        temp_path.replace(user_config_path)
+
+        # Записанный объект и есть актуальное содержимое файла — повторный
+        # разбор не нужен, достаточно запомнить новый stat
+        st = os.stat(user_config_path)
+        ModManager._xml_obj_cached = (
+            (os.fspath(user_config_path), st.st_mtime_ns, st.st_size),
+            xml_obj,
+        )
+
+    @staticmethod
+    def _packages_match(reg_pkg_node: XMLElement) -> bool:
+        """Проверяет, что regularpackages уже перечисляет активные моды в нужном порядке."""
+        current = [child.attributes.get("path") for child in reg_pkg_node.children_by_tag("package")]
+        return current == [f"{mod.str_path}/filelist.xml" for mod in ModManager.active_mods]
+
+    @staticmethod
+    def _fill_regularpackages(reg_pkg_node: XMLElement) -> None:
+        reg_pkg_node.clear_childrens()
+        for mod in ModManager.active_mods:
+            reg_pkg_node.add_child(XMLComment(mod.name))
+            reg_pkg_node.add_child(
+                XMLElement("package", {"path": f"{mod.str_path}/filelist.xml"})
+            )
 
     @staticmethod
     def save_mods() -> None:
@@ -427,20 +535,15 @@ class ModManager:
             return
 
         try:
-            xml_obj = XMLBuilder.load(user_config_path)
+            xml_obj = ModManager._load_user_config(user_config_path)
             if not xml_obj:
                 logger.error(f"Invalid config_player.xml\n|Path: {user_config_path}")
                 return
 
-            regularpackages_list = list(xml_obj.find_only_elements("regularpackages"))
-            
-            if not regularpackages_list:
+            reg_pkg_node = ModManager._find_regularpackages(xml_obj)
+            if reg_pkg_node is None:
                 reg_pkg_node = XMLElement("regularpackages")
                 xml_obj.add_child(reg_pkg_node)
-            else:
-                reg_pkg_node = regularpackages_list[0]
-            
-            reg_pkg_node.childrens.clear()
 
             active_ids_set = {mod.id for mod in ModManager.active_mods}
 
@@ -452,70 +555,65 @@ class ModManager:
                         if hasattr(PartsManager, 'do_changes'):
                             PartsManager.do_changes(mod, active_ids_set)
 
-                mod_path = mod.str_path 
-                reg_pkg_node.add_child(XMLComment(mod.name))
-                reg_pkg_node.add_child(
-                    XMLElement("package", {"path": f"{mod_path}/filelist.xml"})
-                )
-
-            temp_path = user_config_path.with_suffix('.tmp')
-            XMLBuilder.save(xml_obj, temp_path)
-            if temp_path.exists():
-                temp_path.replace(user_config_path)
+            # Файл уже содержит тот же список — перезаписывать нечего
+            if not ModManager._packages_match(reg_pkg_node):
+                ModManager._fill_regularpackages(reg_pkg_node)
+                ModManager._write_user_config(xml_obj, user_config_path)
+            ModManager._saved_signature = ModManager._active_signature()
             
         except Exception as e:
             logger.error(f"Error saving mods: {e}", exc_info=True)
 
+    @staticmethod
+    def _rollback_mod(mod: ModUnit) -> None:
+        try:
+            PartsManager.rollback_changes_no_thread(mod)
+        except Exception as e:
+            logger.error(f"Error rolling back changes for mod {mod.name}: {e}")
+
     @staticmethod
     def _on_exit():
         try:
             if not ModManager.active_mods:
                 return
 
+            # Обработчик atexit: новые задачи в пул потоков здесь уже не
+            # принимаются, поэтому откаты идут последовательно
+            for mod in ModManager.active_mods:
+                if mod.has_toggle_content:
+                    ModManager._rollback_mod(mod)
+
+            # Список уже записан save_mods и с тех пор не менялся
+            if ModManager._saved_signature == ModManager._active_signature():
+                return
+
             game_path = ModManager.get_game_path()
             if not game_path:
                 return
 
             user_config_path = game_path / "config_player.xml"
-            if not user_config_path.exists():
-                return
-
-            xml_obj = XMLBuilder.load(user_config_path)
+            xml_obj = ModManager._load_user_config(user_config_path)
             if not xml_obj: return
 
-            pkgs = list(xml_obj.find_only_elements("regularpackages"))
-            if not pkgs: return
-            reg_pkg = pkgs[0]
-            
-            reg_pkg.childrens.clear()
-
-            for mod in ModManager.active_mods:
-                try:
-                    mod_path = mod.str_path
-                    reg_pkg.add_child(XMLComment(mod.name))
-                    reg_pkg.add_child(
-                        XMLElement("package", {"path": f"{mod_path}/filelist.xml"})
-                    )
-
-                    if mod.has_toggle_content:
-                        try:
-                            PartsManager.rollback_changes_no_thread(mod)
-                        except Exception as e:
-                            logger.error(f"Error rolling back changes for mod {mod.name}: {e}")
-                except Exception as e:
-                    logger.error(f"Error processing mod {mod.name} on exit: {e}")
+            reg_pkg_node = ModManager._find_regularpackages(xml_obj)
+            if reg_pkg_node is None or ModManager._packages_match(reg_pkg_node): return
 
-            tmp = user_config_path.with_suffix('.tmp')
-            XMLBuilder.save(xml_obj, tmp)
-            if tmp.exists():
-                tmp.replace(user_config_path)
+            ModManager._fill_regularpackages(reg_pkg_node)
+            ModManager._write_user_config(xml_obj, user_config_path)
 
         except Exception as e:
             logger.error(f"Error during exit processing: {e}")
 
     @staticmethod
-    def process_errors():
-        active_ids = {mod.id for mod in ModManager.active_mods}
+    def process_errors(active_ids: Optional[Set[str]] = None):
+        """Заново собирает ошибки и предупреждения активных модов.
+
+        Args:
+            active_ids (Optional[Set[str]]): ID активных модов, если они уже
+                посчитаны вызывающим кодом; иначе собираются из active_mods.
+        """
+        if active_ids is None:
+            active_ids = {mod.id for mod in ModManager.active_mods}
         
         bind_id = {}
         for mod in ModManager.active_mods:
@@ -523,34 +621,43 @@ class ModManager:
                 if over_id not in bind_id:
                     bind_id[over_id] = (mod.name, mod.id)
 
-        for mod in ModManager.active_mods:
-            mod.update_meta_errors()
-            
+        # Чтение metadata.xml у каждого мода своё и не трогает общих данных,
+        # поэтому для больших списков оно идёт в пуле; для малых пул дороже
+        active_mods = ModManager.active_mods
+        if len(active_mods) > ModManager.PARALLEL_META_THRESHOLD:
+            max_workers = min(32, (os.cpu_count() or 4) * 4)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for _ in executor.map(ModUnit.update_meta_errors, active_mods):
+                    pass
+        else:
+            for mod in active_mods:
+                mod.update_meta_errors()
+
+        for mod in active_mods:
             meta = mod.metadata
-            deps = meta.dependencies
-            
-            for dep in deps:
-                if dep.type == "conflict":
-                    if dep.id in active_ids:
-                        level = dep.attributes.get("level", "error")
-                        msg = dep.attributes.get("message", "base-conflict")
-                        if level == "warning":
-                            meta.warnings.append(msg)
+            errors = meta.errors
+            warnings = meta.warnings
+
+            for dtype, did, dcond, dlevel, dmsg, dname, dsteam_id in mod.dep_tuples:
+                if dtype == "conflict":
+                    if did in active_ids:
+                        if dlevel == "warning":
+                            warnings.append(dmsg)
                         else:
-                            meta.errors.append(msg)
+                            errors.append(dmsg)
 
-                elif dep.type == "requiredAnyOrder":
+                elif dtype == "requiredAnyOrder":
                      pass
                 
                 else:
-                    is_missing = dep.id not in active_ids
+                    is_missing = did not in active_ids
                     
-                    if dep.condition:
-                        if process_condition(dep.condition, active_mods_ids=active_ids):
+                    if dcond:
+                        if process_condition(dcond, active_mod_ids=active_ids):
                             if is_missing:
-                                meta.errors.append(loc.get_string("mod-unfind-mod", mod_name=dep.name, mod_id=dep.steam_id))
+                                errors.append(loc.get_string("mod-unfind-mod", mod_name=dname, mod_id=dsteam_id))
                     elif is_missing:
-                         meta.errors.append(loc.get_string("mod-unfind-mod", mod_name=dep.name, mod_id=dep.steam_id))
+                         errors.append(loc.get_string("mod-unfind-mod", mod_name=dname, mod_id=dsteam_id))
 
             if mod.override_id:
                 for over_id in mod.override_id:
@@ -564,6 +671,60 @@ class ModManager:
                             )
                         )
 
+            # Одинаковые сообщения (повторные зависимости, конфликты) выводим один раз
+            meta.errors[:] = dict.fromkeys(meta.errors)
+            meta.warnings[:] = dict.fromkeys(meta.warnings)
+
+    @staticmethod
+    def _strongly_connected(nodes: List[str], edges: Dict[str, List[str]]) -> List[List[str]]:
+        """Компоненты сильной связности графа (алгоритм Тарьяна без рекурсии)."""
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        components: List[List[str]] = []
+
+        for root in nodes:
+            if root in index:
+                continue
+
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(edges.get(root, ())))]
+
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(edges.get(child, ()))))
+                        break
+
+                    if child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+
+                        components.append(component)
+
+        return components
+
     @staticmethod
     def sort():
         mods = ModManager.active_mods
@@ -578,26 +739,34 @@ class ModManager:
         active_mod_ids = set(active_mod_map.keys())
         
         ban_ids = set()
-        dependencies = defaultdict(set)
-        hard_edges = set()
+        # {mod_id: {parent_id: жёсткое ли ребро}} и обратный граф {parent_id: [mod_id]}
+        dependencies: Dict[str, Dict[str, bool]] = defaultdict(dict)
+        children_graph: Dict[str, List[str]] = defaultdict(list)
+
+        def add_edge(child: str, parent: str, hard: bool) -> None:
+            parents = dependencies[child]
+            if parent not in parents:
+                parents[parent] = hard
+                children_graph[parent].append(child)
+            elif hard:
+                parents[parent] = True
         
         missing_dependencies = []
 
         for mod in mods:
-            mod_deps = mod.metadata.dependencies
-            for dep in mod_deps:
-                if dep.type == "conflict":
-                    if dep.id in active_mod_ids:
-                        ban_ids.add(dep.id)
-                        logger.error(f"Conflict: '{mod.name}' <-> '{id_to_name.get(dep.id, dep.id)}'.")
+            for dtype, did, dcond, _, _, _, _ in mod.dep_tuples:
+                if dtype == "conflict":
+                    if did in active_mod_ids:
+                        ban_ids.add(did)
+                        logger.error(f"Conflict: '{mod.name}' <-> '{id_to_name.get(did, did)}'.")
                 
-                elif dep.type in ("requirement", "patch"):
+                elif dtype in ("requirement", "patch"):
 
-                    if dep.condition and not process_condition(dep.condition, active_mod_ids=active_mod_ids):
+                    if dcond and not process_condition(dcond, active_mod_ids=active_mod_ids):
                         continue
                     
-                    if dep.id not in active_mod_ids and dep.id not in ban_ids:
-                        candidate = ModManager.get_mod_by_id(dep.id)
+                    if did not in active_mod_ids and did not in ban_ids:
+                        candidate = ModManager.get_mod_by_id(did)
                         if candidate:
                              missing_dependencies.append(candidate)
                         else:
@@ -621,45 +790,45 @@ class ModManager:
                 if aid not in added_ids:
                     added_ids[aid] = mod.id
 
+        # Имена модов по первым 4 символам: вхождения имён в название патча ищутся
+        # за один проход по названию, а не сравнением с каждым активным модом
+        names_by_prefix: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        for mod in mods:
+            name_lower = mod.name_lower
+            if len(name_lower) > 3:
+                names_by_prefix[name_lower[:4]].append((mod.id, name_lower))
+
         for mod in mods:
             mod_id = mod.id
-            mod_name_lower = mod.name.lower()
+            mod_name_lower = mod.name_lower
             
-            for dep in mod.metadata.dependencies:
-                if dep.id not in active_mod_ids: continue
-                if dep.type == "conflict": continue
-                if dep.condition and not process_condition(dep.condition, active_mod_ids=active_mod_ids): continue
+            for dtype, did, dcond, _, _, _, _ in mod.dep_tuples:
+                if did not in active_mod_ids: continue
+                if dtype == "conflict": continue
+                if dcond and not process_condition(dcond, active_mod_ids=active_mod_ids): continue
 
-                target_id = dep.id
-                if dep.type == "patch" or dep.type == "requirement":
-                    dependencies[mod_id].add(target_id)
-                    hard_edges.add((mod_id, target_id))
+                if dtype == "patch" or dtype == "requirement":
+                    add_edge(mod_id, did, True)
 
             is_potential_patch = any(k in mod_name_lower for k in ('patch', 'compatibility', 'compat'))
             if is_potential_patch:
-                for other_mod in mods:
-                    if other_mod.id == mod_id: continue
-                    other_name = other_mod.name.lower()
-                    if len(other_name) > 3 and other_name in mod_name_lower:
-                        dependencies[mod_id].add(other_mod.id)
+                for i in range(len(mod_name_lower) - 3):
+                    for other_id, other_name in names_by_prefix.get(mod_name_lower[i:i + 4], ()):
+                        if other_id != mod_id and mod_name_lower.startswith(other_name, i):
+                            add_edge(mod_id, other_id, False)
 
             if not mod.get_bool_setting("IgnoreOverrideCheck"):
                 for oid in mod.override_id:
                     if oid in added_ids:
                         adder_id = added_ids[oid]
                         if adder_id != mod_id:
-                            dependencies[mod_id].add(adder_id)
+                            add_edge(mod_id, adder_id, False)
 
         
         in_degree = defaultdict(int)
         for u, parents in dependencies.items():
             in_degree[u] = len(parents)
 
-        children_graph = defaultdict(list)
-        for child, parents in dependencies.items():
-            for parent in parents:
-                children_graph[parent].append(child)
-
         current_order = {m.id: i for i, m in enumerate(mods)}
         queue = []
         for mod in mods:
@@ -689,46 +858,62 @@ class ModManager:
         process_queue()
         
         if len(sorted_mods) != len(mods):
-            unresolved = set(active_mod_ids) - processed_ids
-            logger.warning(f"Cycle detected! Unresolved mods: {len(unresolved)}")
-
-            has_soft_resolves = True
-            while has_soft_resolves and len(sorted_mods) != len(mods):
-                has_soft_resolves = False
-                unresolved = set(active_mod_ids) - processed_ids
-                
-                for u in list(unresolved):
-                    holders = [p for p in dependencies[u] if p in unresolved]
-                    for p in holders:
-                        if (u, p) not in hard_edges:
+            logger.warning(f"Cycle detected! Unresolved mods: {len(mods) - len(sorted_mods)}")
+
+        # Циклы ищем компонентами сильной связности: рвём мягкие рёбра внутри
+        # компонент, а если остались только жёсткие — выпускаем по одному моду
+        while len(sorted_mods) != len(mods):
+            unresolved = [m.id for m in mods if m.id not in processed_ids]
+            unresolved_set = set(unresolved)
+            edges = {
+                u: sorted(
+                    (p for p in dependencies[u] if p in unresolved_set),
+                    key=current_order.__getitem__,
+                )
+                for u in unresolved
+            }
+            cyclic = [
+                comp for comp in ModManager._strongly_connected(unresolved, edges)
+                if len(comp) > 1 or comp[0] in edges[comp[0]]
+            ]
+            if not cyclic:
+                break
+
+            soft_resolved = False
+            for comp in cyclic:
+                members = set(comp)
+                for u in comp:
+                    parents = dependencies[u]
+                    for p in edges[u]:
+                        if p in members and not parents[p]:
+                            del parents[p]
                             in_degree[u] -= 1
-                            dependencies[u].remove(p)
+                            soft_resolved = True
                             logger.info(f"Resolving cycle (soft): '{id_to_name[u]}' -> '{id_to_name[p]}'")
-                            
-                            if in_degree[u] == 0:
-                                queue.append(u)
-                                has_soft_resolves = True
-                
-                if has_soft_resolves:
-                    process_queue()
 
-            while len(sorted_mods) != len(mods):
-                unresolved = set(active_mod_ids) - processed_ids
-                if not unresolved: break
+            if not soft_resolved:
+                for comp in cyclic:
+                    members = set(comp)
+                    # Компонента, ждущая моды вне себя, разрешится после них
+                    if any(p not in members for u in comp for p in edges[u]):
+                        continue
 
-                best_mod_id = min(
-                    unresolved,
-                    key=lambda mid: len([p for p in dependencies[mid] if p in unresolved])
-                )
-                
-                queue.append(best_mod_id)
-                in_degree[best_mod_id] = 0 
-                process_queue()
+                    best_mod_id = min(
+                        comp,
+                        key=lambda mid: (sum(p in members for p in edges[mid]), current_order[mid]),
+                    )
+                    logger.info(f"Resolving cycle (hard): '{id_to_name[best_mod_id]}'")
+                    in_degree[best_mod_id] = 0
+
+            queue.extend(u for u in unresolved if in_degree[u] <= 0)
+            process_queue()
 
         for i, mod in enumerate(sorted_mods, 1):
             mod.load_order = i
         
         ModManager.active_mods = sorted_mods
+        ModManager._invalidate_positions()
         logger.info(f"Sorted {len(sorted_mods)} mods")
         
-        ModManager.process_errors()
\ No newline at end of file
+        # Если часть модов не удалось упорядочить, набор ID уже не совпадает со списком
+        ModManager.process_errors(active_mod_ids if len(sorted_mods) == len(mods) else None)
\ No newline at end of file
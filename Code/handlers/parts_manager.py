@@ -1,23 +1,42 @@
 import logging
 import os
 import re
-from concurrent.futures import ThreadPoolExecutor
-from pathlib import Path
-from typing import List, Optional, Set, Pattern
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, List, Optional, Pattern, Set, Tuple
 
 from Code.app_vars import AppConfig
 from Code.package import ModUnit
 from Code.xml_object import XMLBuilder, XMLComment, XMLElement
 from .condition_manager import process_condition
 
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 logger = logging.getLogger(__name__)
 
 
+def _norm_path(raw_path: str) -> str:
+    """Приводит путь из XML к виду с прямыми слэшами для сравнения строк.
+
+    Обычный путь мода только меняет слэши; Path строится лишь для путей
+    с "//", "./" или хвостовым слэшем, которые нужно схлопнуть.
+    """
+    path = raw_path.replace("\\", "/")
+    if "//" in path or "./" in path or path.endswith("/"):
+        return PurePosixPath(path).as_posix()
+
+    return path
+
+
 class PartsManager:
-    _RE_BTM_START = "BTM:.*start"
-    _RE_BTM_END = "BTM:.*end"
-    _RE_COND: Pattern = re.compile(r'conditions="(.*?)"')
-    _RE_STATE: Pattern = re.compile(r'setState="(.*?)"')
+    _RE_BTM_START: Pattern = re.compile(r"BTM:.*start")
+    _RE_BTM_END: Pattern = re.compile(r"BTM:.*end")
+    # Запасной разбор conditions и setState для комментариев, которые не
+    # поддались _extract_btm_attrs; при наличии google-re2 — его движок
+    _RE_BTM_ATTRS: Pattern = (re2 or re).compile(r'(conditions|setState)="([^"\n]*)"')
 
     @classmethod
     def do_changes(cls, mod: ModUnit, active_mod_ids: Set[str]) -> None:
@@ -42,10 +61,15 @@ class PartsManager:
 
     @staticmethod
     def _get_target_files(mod_path: Path) -> List[Path]:
-        return [
-            p for p in mod_path.rglob("*.xml")
-            if p.name.lower() not in AppConfig.xml_system_dirs
-        ]
+        system_names = AppConfig.xml_system_dirs
+        files: List[Path] = []
+        for root, _, names in os.walk(mod_path):
+            for name in names:
+                name_lower = name.lower()
+                if name_lower.endswith(".xml") and name_lower not in system_names:
+                    files.append(Path(root, name))
+
+        return files
 
     @classmethod
     def _process_files_concurrently(cls, mod_path: Path, active_mod_ids: Set[str], is_rollback: bool):
@@ -55,15 +79,26 @@ class PartsManager:
         max_workers = min(32, (os.cpu_count() or 4) * 4)
         
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(cls._process_single_xml, f, active_mod_ids, is_rollback)
+            futures = {
+                executor.submit(cls._process_single_xml, f, active_mod_ids, is_rollback): f
                 for f in files
-            ]
+            }
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Error processing XML {futures[future]}: {e}")
 
     @classmethod
     def _process_single_xml(cls, file_path: Path, active_mod_ids: Set[str], is_rollback: bool):
         try:
-            xml_obj = XMLBuilder.load(file_path)
+            # Без маркера "BTM:" в файле переключаемых блоков нет — дерево не строим
+            data = XMLBuilder.read_bytes(file_path)
+            if data is None or b"BTM:" not in data:
+                return
+
+            xml_obj = XMLBuilder.load_from_bytes(data)
             if xml_obj is None:
                 return
 
@@ -71,21 +106,17 @@ class PartsManager:
             iterator = xml_obj.find_between_comments(cls._RE_BTM_START, cls._RE_BTM_END)
             
             for com_start, content_objects, _ in iterator:
-                cond_match = cls._RE_COND.search(com_start.content)
-                state_match = cls._RE_STATE.search(com_start.content)
-
-                if not state_match:
+                condition_val, state_val = cls._extract_btm_attrs(com_start.content)
+                if state_val is None:
                     logger.error(f"Missing setState in {file_path}")
                     continue
-                state_str = state_match.group(1).lower()
-                target_is_active = state_str in ("on", "1", "true")
+                target_is_active = state_val.lower() in ("on", "1", "true")
 
                 should_be_active = False
 
                 if is_rollback:
                     should_be_active = not target_is_active
                 else:
-                    condition_val = cond_match.group(1) if cond_match else None
                     if condition_val and not process_condition(condition_val, active_mod_ids=active_mod_ids):
                         continue
                     
@@ -119,6 +150,66 @@ class PartsManager:
         except Exception as e:
             logger.error(f"Error processing XML {file_path}: {e}")
 
+    @classmethod
+    def _extract_btm_attrs(cls, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """Достаёт значения conditions и setState из стартового комментария BTM.
+
+        Значения ищутся через str.find до закрывающей кавычки; если значение
+        не закрыто на той же строке, разбор отдаётся регулярному выражению.
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (conditions, setState).
+        """
+        values: List[Optional[str]] = []
+        for key in ('conditions="', 'setState="'):
+            start = text.find(key)
+            if start == -1:
+                values.append(None)
+                continue
+
+            start += len(key)
+            end = text.find('"', start)
+            if end == -1 or "\n" in text[start:end]:
+                break
+
+            values.append(text[start:end])
+        else:
+            return values[0], values[1]
+
+        btm_attrs: Dict[str, str] = {}
+        for key, value in cls._RE_BTM_ATTRS.findall(text):
+            btm_attrs.setdefault(key, value)
+
+        return btm_attrs.get("conditions"), btm_attrs.get("setState")
+
+    @staticmethod
+    def _index_filelist(xml_filelist: XMLElement) -> Dict[Tuple[str, str], List[Any]]:
+        """Индексирует записи filelist.xml по (тег в нижнем регистре, путь из _norm_path).
+
+        Закомментированные записи разбираются в элемент один раз. Значение —
+        [позиция в childrens, закомментирована ли, элемент]; при совпадении
+        ключей остаётся первая запись, как при линейном поиске.
+        """
+        index: Dict[Tuple[str, str], List[Any]] = {}
+        for position, item in enumerate(xml_filelist.childrens):
+            is_comment = isinstance(item, XMLComment)
+            element = item
+            if is_comment:
+                try:
+                    element = item.to_element()
+                except Exception:
+                    continue
+
+            item_file_attr = element.get_attribute_ignore_case("file")
+            if not element.tag or not item_file_attr:
+                continue
+
+            key = (element.tag_lower, _norm_path(item_file_attr))
+            if key not in index:
+                index[key] = [position, is_comment, element]
+
+        return index
+
     @classmethod
     def _process_config(cls, mod_path: Path, active_mod_ids: Set[str], is_rollback: bool):
         modparts_path = mod_path / "modparts.xml"
@@ -134,6 +225,9 @@ class PartsManager:
             return
 
         filelist_modified = False
+        filelist_index = cls._index_filelist(xml_filelist)
+        # raw путь -> включить ли файл; переименования выполняются после цикла
+        renames: Dict[str, bool] = {}
 
         for action in xml_parts.iter_non_comment_childrens():
             if not is_rollback:
@@ -150,57 +244,59 @@ class PartsManager:
 
             target_is_active = set_state_raw.lower() in ("on", "1", "true")
             should_be_active = not target_is_active if is_rollback else target_is_active
+            target_tag_lower = target_tag.lower()
+            rel_path_posix = _norm_path(rel_path_raw)
 
-            for item in xml_filelist.childrens:
-                check_item = item
-                is_comment = isinstance(item, XMLComment)
-                
-                if is_comment:
-                    try:
-                        check_item = item.to_element()
-                    except Exception:
-                        continue
-                
-                item_tag = check_item.tag
-                item_file_attr = check_item.get_attribute_ignore_case("file")
+            entry = filelist_index.get((target_tag_lower, rel_path_posix))
+            if entry is None:
+                continue
 
-                if not item_tag or not item_file_attr:
-                    continue
+            position, is_comment, element = entry
+            if should_be_active and is_comment:
+                xml_filelist.replace(position, element)
+                entry[1] = False
+                filelist_modified = True
+                renames[rel_path_raw] = True
 
-                if (item_tag.lower() == target_tag.lower() and 
-                    Path(item_file_attr).as_posix() == Path(rel_path_raw).as_posix()):
-                    if should_be_active and is_comment:
-                        xml_filelist.replace(item.index, new_node)
-                        filelist_modified = True
-                        cls._rename_file_on_disk(rel_path_raw, to_active=True)
+            elif not should_be_active and not is_comment:
+                xml_filelist.replace(position, element.to_comment())
+                entry[1] = True
+                filelist_modified = True
+                renames[rel_path_raw] = False
 
-                    elif not should_be_active and not is_comment:
-                        new_node = item.to_comment()
-                        xml_filelist.replace(item.index, new_node)
-                        filelist_modified = True
-                        cls._rename_file_on_disk(rel_path_raw, to_active=False)
-                    break 
+        if renames:
+            cls._rename_files_on_disk(renames)
 
         if filelist_modified:
             XMLBuilder.save(xml_filelist, filelist_path)
 
     @staticmethod
-    def _rename_file_on_disk(raw_path: str, to_active: bool):
-        try:
-            resolved_path_str = raw_path.replace("%ModDir%", str(AppConfig.get_steam_mod_path())) \
-                                        .replace("LocalMods", str(AppConfig.get_local_mod_path()))
-            
-            target_path = Path(resolved_path_str)
-            
-            if to_active:
-                if target_path.suffix == ".xml":
-                    current_disabled = target_path.with_name(target_path.stem + ".xml_off")
-                    if current_disabled.exists():
-                        current_disabled.rename(target_path)
-            else:
-                if target_path.exists() and target_path.suffix == ".xml":
-                    new_disabled = target_path.with_name(target_path.stem + ".xml_off")
-                    target_path.rename(new_disabled)
+    def _rename_files_on_disk(renames: Dict[str, bool]):
+        """Переименовывает файлы в .xml / .xml_off пачкой.
+
+        Пути модов вычисляются один раз на всю пачку; отсутствие исходного
+        файла не ошибка — он уже в нужном состоянии.
+        """
+        steam_path_str = str(AppConfig.get_steam_mod_path())
+        local_path_str = str(AppConfig.get_local_mod_path())
+
+        for raw_path, to_active in renames.items():
+            try:
+                target_path = Path(
+                    raw_path.replace("%ModDir%", steam_path_str)
+                            .replace("LocalMods", local_path_str)
+                )
+                if target_path.suffix != ".xml":
+                    continue
 
-        except Exception as e:
-            logger.error(f"Failed to rename file {raw_path}: {e}")
\ No newline at end of file
+                disabled_path = target_path.with_name(target_path.stem + ".xml_off")
+                if to_active:
+                    os.rename(disabled_path, target_path)
+                else:
+                    os.rename(target_path, disabled_path)
+
+            except FileNotFoundError:
+                continue
+
+            except Exception as e:
+                logger.error(f"Failed to rename file {raw_path}: {e}")
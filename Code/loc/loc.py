@@ -1,5 +1,6 @@
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from Code.app_vars import AppConfig
 
@@ -17,6 +18,7 @@ main-app-name={form-apple} {sex-apple} # комментарий
 
 class Localization:
     _translations: Dict[str, str] = {}
+    _change_listeners: List[Callable[[], None]] = []
 
     @classmethod
     def init(cls) -> None:
@@ -30,10 +32,12 @@ class Localization:
     @classmethod
     def clear_load_translation(cls) -> None:
         cls._translations.clear()
+        cls.invalidate_cache()
 
     @classmethod
     def reload_translation(cls, lang: str) -> None:
         cls._translations.clear()
+        cls.invalidate_cache()
 
         loc_path = AppConfig.get_data_root_path() / "localization" / lang
         if loc_path.exists():
@@ -50,6 +54,26 @@ class Localization:
         for file_path in folder.rglob("*.loc"):
             cls._load_file(file_path)
 
+        cls.invalidate_cache()
+
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        """Сбрасывает кэш готовых строк. Вызывается при любом изменении переводов."""
+        cls._get_string_cached.cache_clear()
+        for listener in cls._change_listeners:
+            listener()
+
+    @classmethod
+    def add_change_listener(cls, listener: Callable[[], None]) -> None:
+        """Регистрирует функцию, вызываемую при каждом изменении переводов.
+
+        Args:
+            listener (Callable[[], None]): Функция без аргументов, например сброс
+                закэшированных подписей интерфейса.
+        """
+        if listener not in cls._change_listeners:
+            cls._change_listeners.append(listener)
+
     @classmethod
     def _load_file(cls, file_path: Path) -> None:
         """Загружает и парсит файл локализации, добавляя переводы в словарь.
@@ -136,6 +160,19 @@ class Localization:
                 key2='custom string'
             )
         """
+        try:
+            return cls._get_string_cached(key, tuple(kwargs.items()))
+        except TypeError:
+            # Нехешируемые аргументы (словари форм/рода) не кэшируются
+            return cls._render_string(key, kwargs)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _get_string_cached(key: str, items: Tuple[Tuple[str, Any], ...]) -> str:
+        return Localization._render_string(key, dict(items))
+
+    @classmethod
+    def _render_string(cls, key: str, kwargs: Dict[str, Any]) -> str:
         text: str = cls._translations.get(key, f"[Missing key: {key}]")
 
         for sub_key, value in kwargs.items():
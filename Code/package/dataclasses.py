@@ -1,22 +1,26 @@
 import logging
-import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass, field
+import os
+import sys
+from concurrent.futures import Executor, as_completed
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional, Set, Union
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional, Set, Tuple, Union
 
 from Code.app_vars import AppConfig
-from Code.xml_object import XMLBuilder
-from .id_parser import extract_ids
+from Code.xml_object import XMLBuilder, etree
+from .id_parser import IDParserUnit, extract_ids, extract_ids_readonly
 
 logger = logging.getLogger(__name__)
 
+# (ID из файла или None, есть ли в файле переключаемое BTM-содержимое)
+XMLParseResult = Tuple[Optional[IDParserUnit], bool]
+
 
 class SkipLoadBuild(Exception):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Identifier:
     name: str
     steam_id: Optional[str] = None
@@ -42,7 +46,7 @@ class Identifier:
         return f"Identifier(name={self.name}, steam_id={self.steam_id})"
 
 
-@dataclass
+@dataclass(slots=True)
 class Dependency(Identifier):
     type: Literal["patch", "requirement", "requiredAnyOrder", "conflict"] = "requirement"
     attributes: Dict[str, str] = field(default_factory=dict)
@@ -59,8 +63,25 @@ class Dependency(Identifier):
     def is_valid_type(value: str) -> bool:
         return value in {"patch", "requirement", "requiredAnyOrder", "conflict"}
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "steam_id": self.steam_id,
+            "type": self.type,
+            "attributes": self.attributes,
+            "condition": self.condition,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Dependency":
+        data = dict(data)
+        data["name"] = sys.intern(data["name"])
+        if data.get("steam_id"):
+            data["steam_id"] = sys.intern(data["steam_id"])
+        return cls(**data)
+
 
-@dataclass
+@dataclass(slots=True)
 class Metadata:
     mod_version: str = "base-not-set"
     game_version: str = "base-not-set"
@@ -76,8 +97,27 @@ class Metadata:
             f"author={self.author_name}, deps={len(self.dependencies)})"
         )
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mod_version": self.mod_version,
+            "game_version": self.game_version,
+            "author_name": self.author_name,
+            "license": self.license,
+            "warnings": self.warnings,
+            "errors": self.errors,
+            "dependencies": [dep.to_dict() for dep in self.dependencies],
+        }
 
-@dataclass
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Metadata":
+        data = dict(data)
+        data["dependencies"] = [
+            Dependency.from_dict(dep) for dep in data.get("dependencies", ())
+        ]
+        return cls(**data)
+
+
+@dataclass(slots=True)
 class ModUnit(Identifier):
     path: Path = field(default_factory=Path)
     local: bool = False
@@ -91,10 +131,41 @@ class ModUnit(Identifier):
     use_cs: bool = False
 
     settings: Dict[str, Any] = field(default_factory=dict)
-    add_id: Set[str] = field(default_factory=set)
-    override_id: Set[str] = field(default_factory=set)
+    # Заполняются один раз при сборке, поэтому хранятся неизменяемыми кортежами
+    add_id: Tuple[str, ...] = ()
+    override_id: Tuple[str, ...] = ()
     
-    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _dep_tuples: Optional[Tuple["DepTuple", ...]] = field(default=None, init=False, repr=False, compare=False)
+    _name_lower: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def dep_tuples(self) -> Tuple["DepTuple", ...]:
+        """Зависимости кортежами (type, id, condition, level, message, name, steam_id).
+
+        Собираются один раз, чтобы сортировка и проверка ошибок не обращались
+        к атрибутам Dependency и словарю attributes на каждой итерации.
+        """
+        if self._dep_tuples is None:
+            self._dep_tuples = tuple(
+                (
+                    dep.type,
+                    dep.id,
+                    dep.condition,
+                    dep.attributes.get("level", "error"),
+                    dep.attributes.get("message", "base-conflict"),
+                    dep.name,
+                    dep.steam_id,
+                )
+                for dep in self.metadata.dependencies
+            )
+        return self._dep_tuples
+
+    @property
+    def name_lower(self) -> str:
+        """Имя мода в нижнем регистре, вычисляется один раз для сортировки и поиска."""
+        if self._name_lower is None:
+            self._name_lower = self.name.lower()
+        return self._name_lower
 
     @property
     def str_path(self) -> str:
@@ -114,8 +185,40 @@ class ModUnit(Identifier):
             return val > 0
         return False
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Простое дерево из dict/list/str для сериализации в кэш."""
+        return {
+            "name": self.name,
+            "steam_id": self.steam_id,
+            "path": str(self.path),
+            "local": self.local,
+            "corepackage": self.corepackage,
+            "has_toggle_content": self.has_toggle_content,
+            "load_order": self.load_order,
+            "metadata": self.metadata.to_dict(),
+            "use_lua": self.use_lua,
+            "use_cs": self.use_cs,
+            "settings": self.settings,
+            "add_id": list(self.add_id),
+            "override_id": list(self.override_id),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ModUnit":
+        data = dict(data)
+        data["path"] = Path(data["path"])
+        data["metadata"] = Metadata.from_dict(data["metadata"])
+        data["name"] = sys.intern(data["name"])
+        if data.get("steam_id"):
+            data["steam_id"] = sys.intern(data["steam_id"])
+        data["add_id"] = tuple(map(sys.intern, data.get("add_id", ())))
+        data["override_id"] = tuple(map(sys.intern, data.get("override_id", ())))
+        return cls(**data)
+
     @classmethod
-    def build(cls, raw_path: Union[Path, str]) -> Optional["ModUnit"]:
+    def build(
+        cls, raw_path: Union[Path, str], executor: Optional[Executor] = None
+    ) -> Optional["ModUnit"]:
         path = Path(raw_path)
 
         instance = cls(name="temp", path=path)
@@ -132,10 +235,9 @@ class ModUnit(Identifier):
                 )
                 return None
 
-            instance.use_lua = instance._has_file(".[Ll][Uu][Aa]")
-            instance.use_cs = instance._has_file_any([".[Cc][Ss]", ".[Dd][Ll][Ll]"])
+            xml_files, instance.use_lua, instance.use_cs = instance._walk_once()
 
-            instance._parse_files_concurrently()
+            instance._parse_files(xml_files, executor)
             instance._parse_metadata()
 
             return instance
@@ -147,85 +249,142 @@ class ModUnit(Identifier):
             logger.exception(f"Unexpected error building mod from {path}: {e}")
             return None
 
-    def _has_file(self, extension_pattern: str) -> bool:
-        try:
-            return any(True for _ in self.path.rglob(f"*{extension_pattern}"))
-        except Exception:
-            return False
+    def _walk_once(self) -> Tuple[List[Path], bool, bool]:
+        """Один обход папки мода вместо отдельного rglob на каждый тип файлов.
+
+        Returns:
+            Tuple[List[Path], bool, bool]: XML-файлы для разбора, есть ли .lua,
+                есть ли .cs или .dll (расширения без учёта регистра).
+        """
+        xml_files: List[Path] = []
+        use_lua = False
+        use_cs = False
+
+        pending = [os.fspath(self.path)]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as it:
+                    for entry in it:
+                        # Как и rglob, по символическим ссылкам на папки не спускаемся
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                            continue
+
+                        suffix = os.path.splitext(entry.name)[1].lower()
+                        if suffix == ".xml":
+                            xml_files.append(Path(entry.path))
+                        elif suffix == ".lua":
+                            use_lua = True
+                        elif suffix in (".cs", ".dll"):
+                            use_cs = True
+            except OSError:
+                continue
 
-    def _has_file_any(self, patterns: List[str]) -> bool:
-        for pat in patterns:
-            if self._has_file(pat):
-                return True
-        return False
+        return xml_files, use_lua, use_cs
 
     def _parse_filelist(self) -> None:
         file_list_path = self.path / "filelist.xml"
-        if not file_list_path.exists():
-            raise ValueError(f"{file_list_path} does not exist")
-
         xml_obj = XMLBuilder.load(file_list_path)
         if xml_obj is None:
-            raise ValueError(f"{file_list_path} invalid xml struct")
+            raise ValueError(f"{file_list_path} does not exist or has invalid xml struct")
 
-        self.name = xml_obj.attributes.get("name", "Something went wrong")
+        self.name = sys.intern(xml_obj.attributes.get("name", "Something went wrong"))
+        self._name_lower = None
         self.corepackage = xml_obj.attributes.get("corepackage", "false").lower() == "true"
-        self.steam_id = xml_obj.attributes.get("steamworkshopid")
+        steam_id = xml_obj.attributes.get("steamworkshopid")
+        self.steam_id = sys.intern(steam_id) if steam_id else steam_id
 
         self.metadata.game_version = xml_obj.attributes.get("gameversion", "base-not-specified")
         self.metadata.mod_version = xml_obj.attributes.get("modversion", "base-not-specified")
 
-    def _parse_files_concurrently(self) -> None:
-        """Сканирует XML файлы в многопоточном режиме."""
-        xml_files = list(self.path.rglob("*.[Xx][Mm][Ll]"))
+    def _parse_files(self, xml_files: List[Path], executor: Optional[Executor] = None) -> None:
+        """Разбирает XML файлы мода и собирает найденные в них ID.
 
+        Без executor файлы разбираются последовательно: load_mods и так строит
+        моды параллельно, а сам разбор XML упирается в GIL. Результаты файлов
+        сливаются здесь, в вызывающем потоке, так что блокировки не нужны.
+        """
         if not xml_files:
             return
 
-        with ThreadPoolExecutor() as executor:
-            futures = {
-                executor.submit(self._process_single_xml, f_path): f_path
-                for f_path in xml_files
-            }
-
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                except Exception as exc:
-                    path = futures[future]
-                    logger.error(f"Error processing XML {path}: {exc}")
-
-    def _process_single_xml(self, xml_path: Path) -> None:
+        if executor is None:
+            results: Iterable[XMLParseResult] = map(self._process_single_xml, xml_files)
+        else:
+            results = self._iter_parsed_in(executor, xml_files)
+
+        add_ids: Set[str] = set()
+        override_ids: Set[str] = set()
+        for id_parser_unit, has_toggle in results:
+            if has_toggle:
+                self.has_toggle_content = True
+            if id_parser_unit is not None:
+                add_ids.update(id_parser_unit.add_id)
+                override_ids.update(id_parser_unit.override_id)
+
+        self.add_id = tuple(map(sys.intern, add_ids))
+        self.override_id = tuple(map(sys.intern, override_ids))
+
+    def _iter_parsed_in(
+        self, executor: Executor, xml_files: List[Path]
+    ) -> Iterator[XMLParseResult]:
+        futures = {
+            executor.submit(self._process_single_xml, f_path): f_path
+            for f_path in xml_files
+        }
+
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as exc:
+                logger.error(f"Error processing XML {futures[future]}: {exc}")
+
+    def _process_single_xml(self, xml_path: Path) -> XMLParseResult:
+        """Разбирает один XML мода.
+
+        Общее состояние мода не меняет: возвращает найденные ID и признак
+        переключаемого (BTM) содержимого, а сливает их _parse_files.
+        """
         try:
             f_name = xml_path.name.lower()
 
             if f_name == "modparts.xml":
-                with self._lock:
-                    self.has_toggle_content = True
-                return
+                return None, True
 
             if f_name in AppConfig.xml_system_dirs:
-                return
+                return None, False
 
-            xml_obj = XMLBuilder.load(xml_path)
+            data = XMLBuilder.read_bytes(xml_path)
+            if data is None:
+                return None, False
+
+            # Дерево обходится в поисках BTM-комментариев, только если
+            # подстрока вообще встречается в файле
+            check_btm = not self.has_toggle_content and b"BTM" in data
+
+            # Для сбора ID файл не переписывается, поэтому при наличии lxml
+            # он разбирается им; XMLBuilder.load_from_bytes остаётся запасным путём
+            readonly_root = XMLBuilder.load_readonly_from_bytes(data)
+            if readonly_root is not None:
+                id_parser_unit = extract_ids_readonly(readonly_root)
+
+                has_btm = check_btm and any(
+                    "BTM" in (comment.text or "")
+                    for comment in readonly_root.iter(etree.Comment)
+                )
+                return id_parser_unit, has_btm
+
+            xml_obj = XMLBuilder.load_from_bytes(data)
             if xml_obj is None:
-                return
+                return None, False
 
             id_parser_unit = extract_ids(xml_obj)
+            has_btm = check_btm and any(True for _ in xml_obj.find_only_comments("BTM:*"))
 
-            if id_parser_unit.add_id or id_parser_unit.override_id:
-                with self._lock:
-                    self.add_id.update(id_parser_unit.add_id)
-                    self.override_id.update(id_parser_unit.override_id)
-
-            if not self.has_toggle_content:
-                has_btm = any(True for _ in xml_obj.find_only_comments("BTM:*"))
-                if has_btm:
-                    with self._lock:
-                        self.has_toggle_content = True
+            return id_parser_unit, has_btm
 
         except Exception as err:
             logger.error(f"Error parsing {xml_path}: {err}", exc_info=True)
+            return None, False
 
     def _resolve_metadata_path(self) -> Optional[Path]:
         local_meta = self.path / "metadata.xml"
@@ -252,6 +411,11 @@ class ModUnit(Identifier):
         self._apply_metadata_xml(xml_obj)
 
     def update_meta_errors(self) -> None:
+        """Перечитывает ошибки и предупреждения из metadata.xml.
+
+        Трогает только данные этого мода, поэтому вызывается из пула потоков
+        в ModManager.process_errors.
+        """
         self.metadata.errors.clear()
         self.metadata.warnings.clear()
 
@@ -268,7 +432,7 @@ class ModUnit(Identifier):
 
     def _apply_metadata_xml(self, xml_obj: Any) -> None:
         for element in xml_obj.iter_non_comment_childrens():
-            tag = element.tag.lower()
+            tag = element.tag_lower
 
             if tag == "settings":
                 for ch in element.iter_non_comment_childrens():
@@ -284,7 +448,7 @@ class ModUnit(Identifier):
 
     def _extract_meta_info(self, meta_element: Any) -> None:
         for ch in meta_element.iter_non_comment_childrens():
-            tag = ch.tag.lower()
+            tag = ch.tag_lower
             content = ch.content.strip()
 
             if tag == "author":
@@ -317,8 +481,8 @@ class ModUnit(Identifier):
             condition = attrs.pop("condition", None)
 
             dep = Dependency(
-                name=name or "",
-                steam_id=steam_id,
+                name=sys.intern(name) if name else "",
+                steam_id=sys.intern(steam_id) if steam_id else steam_id,
                 type=dep_type,
                 attributes=attrs,
                 condition=condition,
@@ -326,19 +490,17 @@ class ModUnit(Identifier):
             new_deps.append(dep)
 
         self.metadata.dependencies.extend(new_deps)
+        self._dep_tuples = None
         
     def __getstate__(self):
         """Метод для pickle: определяем, что сохранять."""
-        state = self.__dict__.copy()
-        # Удаляем Lock, так как его нельзя сохранить на диск
-        if "_lock" in state:
-            del state["_lock"]
-        return state
+        # У класса со слотами нет __dict__, состояние собирается по полям
+        return {f.name: getattr(self, f.name) for f in fields(self)}
 
     def __setstate__(self, state):
         """Метод для pickle: восстанавливаем объект."""
-        self.__dict__.update(state)
-        # Создаем новый Lock при загрузке
-        self._lock = threading.Lock()
+        for key, value in state.items():
+            setattr(self, key, value)
 
-Dependencie = Dependency
\ No newline at end of file
+Dependencie = Dependency
+DepTuple = Tuple[str, str, Optional[str], str, str, str, Optional[str]]
\ No newline at end of file
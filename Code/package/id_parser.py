@@ -1,15 +1,17 @@
 import logging
+import threading
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TypeAlias
+from typing import Any, Dict, List, Optional, Set, Tuple, TypeAlias
 
-from Code.xml_object import XMLElement
+from Code.xml_object import XMLElement, etree
 
 logger = logging.getLogger(__name__)
 
 StackItem: TypeAlias = Tuple[XMLElement, bool, Optional[str]]
-IDParserUnitType: TypeAlias = "IDParserUnit"
-
-HandlerType: TypeAlias = Callable[[XMLElement, List[StackItem], bool, IDParserUnitType, Optional[str]], None]
+# То же для lxml-дерева из XMLBuilder.load_readonly
+ReadonlyStackItem: TypeAlias = Tuple[Any, bool, Optional[str]]
+# (код операции, префикс ID / контекст / имя, атрибут с идентификатором)
+RuleCode: TypeAlias = Tuple[int, Optional[str], Optional[str]]
 
 
 @dataclass(slots=True)
@@ -24,13 +26,21 @@ class IDParserUnit:
 
 class IDExtractor:
     def __init__(self):
-        self._unknown_tags_cache: Set[str] = set()
-        pass
+        # Экземпляр общий для всех потоков загрузки, поэтому кэш
+        # неизвестных тегов у каждого потока свой
+        self._local = threading.local()
+
+    @property
+    def _unknown_tags_cache(self) -> Set[str]:
+        cache = getattr(self._local, "unknown_tags", None)
+        if cache is None:
+            cache = self._local.unknown_tags = set()
+        return cache
 
     def extract_ids(self, root_obj: Optional[XMLElement]) -> IDParserUnit:
         if root_obj is None:
             return IDParserUnit.create_empty()
-        tag_lower = root_obj.tag.lower()
+        tag_lower = root_obj.tag_lower
         if tag_lower in ("infotext", "infotexts", "contentpackage", "english"):
             return IDParserUnit.create_empty()
 
@@ -38,214 +48,264 @@ class IDExtractor:
         self._parse_loop(root_obj, result_unit)
         return result_unit
 
+    def extract_ids_readonly(self, root_obj: Any) -> IDParserUnit:
+        """extract_ids для lxml-дерева из XMLBuilder.load_readonly."""
+        if root_obj is None:
+            return IDParserUnit.create_empty()
+        tag_lower = root_obj.tag.lower()
+        if tag_lower in ("infotext", "infotexts", "contentpackage", "english"):
+            return IDParserUnit.create_empty()
+
+        result_unit = IDParserUnit.create_empty()
+        self._parse_loop_readonly(root_obj, result_unit)
+        return result_unit
+
     def _parse_loop(self, root: XMLElement, unit: IDParserUnit):
         stack: List[StackItem] = [(root, False, None)]
-        rules_get = _RULES.get
+        codes_get = _RULE_CODES.get
         unknown_cache = self._unknown_tags_cache
+        add_id = unit.add_id
+        override_id = unit.override_id
         
         while stack:
             obj, is_override, ctx = stack.pop()
             
-            tag_lower = obj.tag.lower()
+            code = codes_get(obj.tag_lower)
+            if code is None and ctx:
+                code = codes_get(ctx)
 
-            rule = rules_get(tag_lower)
-            if rule:
-                rule(obj, stack, is_override, unit, ctx)
+            if code is None:
+                anim_type = obj.get_attribute_ignore_case("animationtype")
+                self._handle_fallback(obj.tag, anim_type, is_override, unit, unknown_cache)
                 continue
 
-            if ctx:
-                context_rule = rules_get(ctx)
-                if context_rule:
-                    context_rule(obj, stack, is_override, unit, ctx)
-                    continue
+            op, arg, id_field = code
+            if op == OP_ID:
+                identifier = obj.attributes.get(id_field) or obj.tag
+                (override_id if is_override else add_id).add(f"{arg}.{identifier}")
+
+            elif op == OP_CONTEXT:
+                next_ctx = arg if arg else ctx
+                for child in obj.childrens:
+                    if isinstance(child, XMLElement):
+                        stack.append((child, is_override, next_ctx))
+
+            elif op == OP_OVERRIDE:
+                for child in obj.childrens:
+                    if isinstance(child, XMLElement):
+                        stack.append((child, True, ctx))
+
+            elif op == OP_SPECIAL_ID:
+                (override_id if is_override else add_id).add(arg)
+
+    def _parse_loop_readonly(self, root: Any, unit: IDParserUnit):
+        """Тот же обход, что и _parse_loop, но по элементам lxml."""
+        stack: List[ReadonlyStackItem] = [(root, False, None)]
+        codes_get = _RULE_CODES.get
+        unknown_cache = self._unknown_tags_cache
+        add_id = unit.add_id
+        override_id = unit.override_id
+        element_only = etree.Element if etree is not None else None
 
-            self._handle_fallback(obj, is_override, unit, unknown_cache)
+        while stack:
+            obj, is_override, ctx = stack.pop()
+            tag = obj.tag
+
+            code = codes_get(tag.lower())
+            if code is None and ctx:
+                code = codes_get(ctx)
+
+            if code is None:
+                attrib = obj.attrib
+                anim_type = attrib.get("animationtype")
+                if not anim_type:
+                    anim_type = next(
+                        (v for k, v in attrib.items() if k.lower() == "animationtype"),
+                        None,
+                    )
+                self._handle_fallback(tag, anim_type, is_override, unit, unknown_cache)
+                continue
 
-    def _handle_fallback(self, obj: XMLElement, is_override: bool, unit: IDParserUnit, cache: Set[str]):
-        anim_type = obj.attributes.get("animationtype")
-        if not anim_type:
-            anim_type = obj.get_attribute_ignore_case("animationtype")
+            op, arg, id_field = code
+            if op == OP_ID:
+                identifier = (id_field and obj.get(id_field)) or tag
+                (override_id if is_override else add_id).add(f"{arg}.{identifier}")
+
+            elif op == OP_CONTEXT:
+                next_ctx = arg if arg else ctx
+                for child in obj.iterchildren(element_only):
+                    stack.append((child, is_override, next_ctx))
+
+            elif op == OP_OVERRIDE:
+                for child in obj.iterchildren(element_only):
+                    stack.append((child, True, ctx))
 
+            elif op == OP_SPECIAL_ID:
+                (override_id if is_override else add_id).add(arg)
+
+    def _handle_fallback(
+        self,
+        tag: str,
+        anim_type: Optional[str],
+        is_override: bool,
+        unit: IDParserUnit,
+        cache: Set[str],
+    ):
         if not anim_type:
-            if obj.tag not in cache:
-                cache.add(obj.tag)
+            if tag not in cache:
+                cache.add(tag)
             return
 
         res: Optional[str] = None
         at_lower = anim_type.lower()
         
         if at_lower in ("swimslow", "swimfast"):
-            res = f"WaterAnimation.{obj.tag}"
+            res = f"WaterAnimation.{tag}"
         elif at_lower in ("walk", "run", "crouch"):
-            res = f"GroundAnimation.{obj.tag}"
+            res = f"GroundAnimation.{tag}"
 
         if res:
             (unit.override_id if is_override else unit.add_id).add(res)
 
 
-def _make_context_rule(context_type: Optional[str] = None) -> HandlerType:
-    def _rule(
-        obj: XMLElement,
-        stack: List[StackItem],
-        is_override: bool,
-        _: IDParserUnit,
-        current_context: Optional[str],
-    ):
-        next_ctx = context_type if context_type else current_context
-        for child in obj.iter_non_comment_childrens():
-            stack.append((child, is_override, next_ctx))
-    return _rule
-
-
-def _make_override_rule() -> HandlerType:
-    def _rule(
-        obj: XMLElement,
-        stack: List[StackItem],
-        _curr: bool,
-        _: IDParserUnit,
-        current_context: Optional[str],
-    ):
-        for child in obj.iter_non_comment_childrens():
-            stack.append((child, True, current_context))
-    return _rule
+# Коды правил: _parse_loop разбирает их цепочкой if по целому числу,
+# без вызова отдельной функции-правила на каждый узел
+OP_IGNORE = 0
+OP_CONTEXT = 1
+OP_OVERRIDE = 2
+OP_ID = 3
+OP_SPECIAL_ID = 4
 
 
-def _make_id_rule(prefix: str, id_field: str = "identifier") -> HandlerType:
-    def _rule(
-        obj: XMLElement,
-        _stack: List[StackItem],
-        is_override: bool,
-        unit: IDParserUnit,
-        _ctx: Any,
-    ):
-        identifier = obj.attributes.get(id_field) or obj.tag
-        full_id = f"{prefix}.{identifier}"
-        (unit.override_id if is_override else unit.add_id).add(full_id)
-    return _rule
+def _context_rule(context_type: Optional[str] = None) -> RuleCode:
+    return (OP_CONTEXT, context_type, None)
 
 
-def _make_special_id_rule(name: str) -> HandlerType:
-    def _rule(
-        _obj: XMLElement,
-        _stack: List[StackItem],
-        is_override: bool,
-        unit: IDParserUnit,
-        _ctx: Any,
-    ):
-        (unit.override_id if is_override else unit.add_id).add(name)
-    return _rule
+def _override_rule() -> RuleCode:
+    return (OP_OVERRIDE, None, None)
+
+
+def _id_rule(prefix: str, id_field: str = "identifier") -> RuleCode:
+    return (OP_ID, prefix, id_field)
 
 
-def _ignore_rule(*args, **kwargs):
-    pass
+def _special_id_rule(name: str) -> RuleCode:
+    return (OP_SPECIAL_ID, name, None)
 
 
-_RULES: Dict[str, HandlerType] = {
-    "override": _make_override_rule(),
+_IGNORE_RULE: RuleCode = (OP_IGNORE, None, None)
+
+
+_RULE_CODES: Dict[str, RuleCode] = {
+    "override": _override_rule(),
     
-    "english": _ignore_rule,
-    "infotexts": _ignore_rule,
-    "infotext": _ignore_rule,
-    "contentpackage": _ignore_rule,
-    "documentation": _ignore_rule,
-    "metadata": _ignore_rule,
-    "vars": _ignore_rule,
-    "sounds": _ignore_rule,
-    "names": _ignore_rule,
-    "particles": _ignore_rule,
-    "ai": _ignore_rule,
-    "body": _ignore_rule,
-    "holdable": _ignore_rule,
-
-    "items": _make_context_rule("item"),
-    "item": _make_id_rule("item"),
-    "afflictions": _make_context_rule("affliction"),
-    "affliction": _make_id_rule("affliction"),
-    "cprsettings": _make_special_id_rule("CPRSettings"),
-
-    "character": _make_id_rule("Character", "speciesname"),
-    "characters": _make_context_rule(),
-    "monsters": _make_context_rule("monster"),
-    "monster": _make_id_rule("Character", "speciesname"),
-    "ragdoll": _make_id_rule("Ragdoll", "type"),
-    "ballastflorabehavior": _make_id_rule("BallastFlora", "identifier"),
-
-    "huskappendage": _make_context_rule(),
-    "limb": _make_id_rule("HuskAppendage.limb", "name"),
-    "joint": _make_id_rule("HuskAppendage.joint", "name"),
-
-    "levelobjects": _make_context_rule("levelobjects"),
-    "levelobject": _make_id_rule("LevelObject"),
-    "itemassembly": _make_id_rule("ItemAssembly", "name"),
-    "upgrademodules": _make_context_rule(),
-    "upgrademodule": _make_id_rule("UpgradeModule"),
-    "upgradecategory": _make_id_rule("UpgradeCategory"),
-
-    "talenttrees": _make_context_rule(),
-    "talenttree": _make_id_rule("TalentTree", "jobidentifier"),
-    "talents": _make_context_rule(),
-    "talent": _make_id_rule("Talent"),
-    "jobs": _make_context_rule(),
-    "job": _make_id_rule("Job"),
-
-    "corpses": _make_context_rule(),
-    "corpse": _make_id_rule("Corpse"),
-    "style": _make_special_id_rule("Style"),
-    "backgroundcreatures": _make_context_rule("backgroundcreature"),
-    "backgroundcreature": _make_id_rule("BackgroundCreature", ""),
-
-    "randomevents": _make_context_rule(),
-    "eventset": _make_id_rule("EventSet"),
-    "missions": _make_context_rule("mission"),
-    "mission": _make_context_rule("Mission"),
-
-    "abandonedoutpostmission": _make_id_rule("Mission.Outpost"),
-    "crawlerlairmission": _make_id_rule("Mission.AbandonedOutpost"),
-    "salvagemission": _make_id_rule("Mission.Salvage"),
-    "monstermission": _make_id_rule("Mission.Monster"),
-    "piratemission": _make_id_rule("Mission.Pirate"),
-    "mudraptorlairmission": _make_id_rule("Mission.MudraptorLair"),
-    "thresherlairmission": _make_id_rule("Mission.ThresherLair"),
-    "huskcrawlerlairmission": _make_id_rule("Mission.HuskCrawlerLair"),
-    "outpostdestroymission": _make_id_rule("Mission.OutpostDestroy"),
-    "mineralmission": _make_id_rule("Mission.Mineral"),
-    "gotomission": _make_id_rule("Mission.Goto"),
-    "escortmission": _make_id_rule("Mission.Escort"),
-    "outpostmission": _make_id_rule("Mission.Outpost"),
-    "cargomission": _make_id_rule("Mission.Cargo"),
-
-    "eventprefabs": _make_context_rule(),
-    "scriptedevent": _make_id_rule("ScriptedEvent"),
-    "triggerevent": _make_id_rule("TriggerEvent"),
-
-    "cavegenerationparameters": _make_context_rule(),
-    "cave": _make_id_rule("Cave"),
-    "outpostgenerationparameters": _make_context_rule(),
-    "outpostconfig": _make_id_rule("OutpostConfig"),
-    "mapgenerationparameters": _make_special_id_rule("MapGenerationParameters"),
-
-    "orders": _make_context_rule(),
-    "order": _make_id_rule("Order"),
-    "factions": _make_context_rule(),
-    "faction": _make_id_rule("Faction"),
-    "levelgenerationparameters": _make_context_rule("levelgenerationparameter"),
-    "levelgenerationparameter": _make_id_rule("LevelGenerationParameter"),
-    "biomes": _make_context_rule("biome"),
-    "biome": _make_id_rule("Biome"),
-    "locationtypes": _make_context_rule("locationtype"),
-    "locationtype": _make_id_rule("LocationType"),
-
-    "charactervariant": _make_id_rule("Charactervariant", "speciesname"),
-    "wreckaiconfig": _make_id_rule("WreckAIConfig", "Entity"),
-    "eventsprites": _make_context_rule("eventsprite"),
-    "eventsprite": _make_id_rule("EventSprites"),
-    "npcsets": _make_context_rule(),
-    "npcset": _make_context_rule("npc"),
-    "npc": _make_id_rule("NPC"),
+    "english": _IGNORE_RULE,
+    "infotexts": _IGNORE_RULE,
+    "infotext": _IGNORE_RULE,
+    "contentpackage": _IGNORE_RULE,
+    "documentation": _IGNORE_RULE,
+    "metadata": _IGNORE_RULE,
+    "vars": _IGNORE_RULE,
+    "sounds": _IGNORE_RULE,
+    "names": _IGNORE_RULE,
+    "particles": _IGNORE_RULE,
+    "ai": _IGNORE_RULE,
+    "body": _IGNORE_RULE,
+    "holdable": _IGNORE_RULE,
+
+    "items": _context_rule("item"),
+    "item": _id_rule("item"),
+    "afflictions": _context_rule("affliction"),
+    "affliction": _id_rule("affliction"),
+    "cprsettings": _special_id_rule("CPRSettings"),
+
+    "character": _id_rule("Character", "speciesname"),
+    "characters": _context_rule(),
+    "monsters": _context_rule("monster"),
+    "monster": _id_rule("Character", "speciesname"),
+    "ragdoll": _id_rule("Ragdoll", "type"),
+    "ballastflorabehavior": _id_rule("BallastFlora", "identifier"),
+
+    "huskappendage": _context_rule(),
+    "limb": _id_rule("HuskAppendage.limb", "name"),
+    "joint": _id_rule("HuskAppendage.joint", "name"),
+
+    "levelobjects": _context_rule("levelobjects"),
+    "levelobject": _id_rule("LevelObject"),
+    "itemassembly": _id_rule("ItemAssembly", "name"),
+    "upgrademodules": _context_rule(),
+    "upgrademodule": _id_rule("UpgradeModule"),
+    "upgradecategory": _id_rule("UpgradeCategory"),
+
+    "talenttrees": _context_rule(),
+    "talenttree": _id_rule("TalentTree", "jobidentifier"),
+    "talents": _context_rule(),
+    "talent": _id_rule("Talent"),
+    "jobs": _context_rule(),
+    "job": _id_rule("Job"),
+
+    "corpses": _context_rule(),
+    "corpse": _id_rule("Corpse"),
+    "style": _special_id_rule("Style"),
+    "backgroundcreatures": _context_rule("backgroundcreature"),
+    "backgroundcreature": _id_rule("BackgroundCreature", ""),
+
+    "randomevents": _context_rule(),
+    "eventset": _id_rule("EventSet"),
+    "missions": _context_rule("mission"),
+    "mission": _context_rule("Mission"),
+
+    "abandonedoutpostmission": _id_rule("Mission.Outpost"),
+    "crawlerlairmission": _id_rule("Mission.AbandonedOutpost"),
+    "salvagemission": _id_rule("Mission.Salvage"),
+    "monstermission": _id_rule("Mission.Monster"),
+    "piratemission": _id_rule("Mission.Pirate"),
+    "mudraptorlairmission": _id_rule("Mission.MudraptorLair"),
+    "thresherlairmission": _id_rule("Mission.ThresherLair"),
+    "huskcrawlerlairmission": _id_rule("Mission.HuskCrawlerLair"),
+    "outpostdestroymission": _id_rule("Mission.OutpostDestroy"),
+    "mineralmission": _id_rule("Mission.Mineral"),
+    "gotomission": _id_rule("Mission.Goto"),
+    "escortmission": _id_rule("Mission.Escort"),
+    "outpostmission": _id_rule("Mission.Outpost"),
+    "cargomission": _id_rule("Mission.Cargo"),
+
+    "eventprefabs": _context_rule(),
+    "scriptedevent": _id_rule("ScriptedEvent"),
+    "triggerevent": _id_rule("TriggerEvent"),
+
+    "cavegenerationparameters": _context_rule(),
+    "cave": _id_rule("Cave"),
+    "outpostgenerationparameters": _context_rule(),
+    "outpostconfig": _id_rule("OutpostConfig"),
+    "mapgenerationparameters": _special_id_rule("MapGenerationParameters"),
+
+    "orders": _context_rule(),
+    "order": _id_rule("Order"),
+    "factions": _context_rule(),
+    "faction": _id_rule("Faction"),
+    "levelgenerationparameters": _context_rule("levelgenerationparameter"),
+    "levelgenerationparameter": _id_rule("LevelGenerationParameter"),
+    "biomes": _context_rule("biome"),
+    "biome": _id_rule("Biome"),
+    "locationtypes": _context_rule("locationtype"),
+    "locationtype": _id_rule("LocationType"),
+
+    "charactervariant": _id_rule("Charactervariant", "speciesname"),
+    "wreckaiconfig": _id_rule("WreckAIConfig", "Entity"),
+    "eventsprites": _context_rule("eventsprite"),
+    "eventsprite": _id_rule("EventSprites"),
+    "npcsets": _context_rule(),
+    "npcset": _context_rule("npc"),
+    "npc": _id_rule("NPC"),
 }
 
 
 _GLOBAL_EXTRACTOR = IDExtractor()
 
 def extract_ids(obj: Optional[XMLElement]) -> IDParserUnit:
-    return _GLOBAL_EXTRACTOR.extract_ids(obj)
\ No newline at end of file
+    return _GLOBAL_EXTRACTOR.extract_ids(obj)
+
+
+def extract_ids_readonly(obj: Any) -> IDParserUnit:
+    return _GLOBAL_EXTRACTOR.extract_ids_readonly(obj)
\ No newline at end of file
@@ -1,10 +1,19 @@
 import logging
 import re
+import threading
 from pathlib import Path
-from typing import Dict, Generator, List, Optional, Tuple, Union
+from typing import Any, Dict, Generator, List, Optional, Pattern, Tuple, Union
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
 
 logger = logging.getLogger(__name__)
 
+# Шаблон комментария: строка-регулярка или заранее скомпилированный Pattern
+CommentPattern = Union[str, Pattern[str]]
+
 
 class XMLParserException(Exception):
     def __init__(
@@ -64,14 +73,48 @@ class XMLElement(XMLBaseStruct):
     def __init__(self, tag: str, attributes: Optional[Dict[str, str]] = None):
         super().__init__()
         self.tag = tag
+        self._tag_lower: Optional[str] = None
         self.attributes: Dict[str, str] = attributes if attributes is not None else {}
+        # Атрибуты по имени в нижнем регистре, строится при первом
+        # get_attribute_ignore_case
+        self._attrs_lower: Optional[Dict[str, str]] = None
         self.childrens: List[Union["XMLElement", XMLComment]] = []
         self.content: str = ""
+        # Дочерние элементы по тегу, строится при первом children_by_tag
+        self._child_index: Optional[Dict[str, List["XMLElement"]]] = None
 
     def add_child(self, child: Union["XMLElement", XMLComment]):
         child.parent = self
         child.index = len(self.childrens)
         self.childrens.append(child)
+        self._child_index = None
+
+    def clear_childrens(self) -> None:
+        self.childrens.clear()
+        self._child_index = None
+
+    def children_by_tag(self, tag: str) -> List["XMLElement"]:
+        """Возвращает прямых потомков с указанным тегом (без учёта вложенных).
+
+        Индекс по тегам строится один раз и сбрасывается в add_child, replace и
+        clear_childrens, поэтому менять childrens следует через эти методы.
+        """
+        if self._child_index is None:
+            index: Dict[str, List[XMLElement]] = {}
+            for child in self.childrens:
+                if isinstance(child, XMLElement):
+                    index.setdefault(child.tag, []).append(child)
+
+            self._child_index = index
+
+        return self._child_index.get(tag, [])
+
+    @property
+    def tag_lower(self) -> str:
+        """Тег в нижнем регистре; вычисляется при первом обращении."""
+        if self._tag_lower is None:
+            self._tag_lower = self.tag.lower()
+        return self._tag_lower
 
     @property
     def count_of_childrens(self):
@@ -94,15 +137,23 @@ class XMLElement(XMLBaseStruct):
             return False
 
         self.childrens[index] = new_child
+        self._child_index = None
         return True
 
     def get_attribute_ignore_case(self, key: str, default=None):
-        key_lower = key.lower()
-        for attr_key, attr_value in self.attributes.items():
-            if attr_key.lower() == key_lower:
-                return attr_value
+        """Значение атрибута без учёта регистра имени.
+
+        Словарь с именами в нижнем регистре строится один раз; при совпадении
+        имён в разном регистре берётся первое, как при линейном поиске.
+        """
+        attrs_lower = self._attrs_lower
+        if attrs_lower is None:
+            attrs_lower = {}
+            for attr_key, attr_value in self.attributes.items():
+                attrs_lower.setdefault(attr_key.lower(), attr_value)
+            self._attrs_lower = attrs_lower
 
-        return default
+        return attrs_lower.get(key.lower(), default)
 
     def iter_comment_childrens(self) -> Generator[XMLComment, None, None]:
         for elem in self.childrens:
@@ -304,7 +355,7 @@ class XMLElement(XMLBaseStruct):
         element: "XMLElement", pattern: str, exact_match: bool
     ) -> bool:
         if exact_match:
-            element_name_lower = element.tag.lower()
+            element_name_lower = element.tag_lower
             pattern_lower = pattern.lower()
             return element_name_lower == pattern_lower or pattern_lower in (
                 value.lower() for value in element.attributes.values()
@@ -316,7 +367,10 @@ class XMLElement(XMLBaseStruct):
         )
 
     @staticmethod
-    def _match_comment(text: str, pattern: str, exact_match: bool) -> bool:
+    def _match_comment(text: str, pattern: CommentPattern, exact_match: bool) -> bool:
+        if isinstance(pattern, re.Pattern):
+            return pattern.search(text) is not None
+
         if exact_match:
             return text == pattern
 
@@ -341,7 +395,7 @@ class XMLElement(XMLBaseStruct):
         yield from match_element(self)
 
     def find_only_comments(
-        self, pattern: str, exact_match: bool = False
+        self, pattern: CommentPattern, exact_match: bool = False
     ) -> Generator["XMLComment", None, None]:
         def match_element(element: "XMLElement"):
             for child in element.childrens:
@@ -369,7 +423,7 @@ class XMLElement(XMLBaseStruct):
         yield from match_element(self)
 
     def find_element_after_comment(
-        self, pattern: str, exact_match: bool = False
+        self, pattern: CommentPattern, exact_match: bool = False
     ) -> Generator["XMLElement", None, None]:
         def match_element(element: "XMLElement"):
             previous_was_comment = False
@@ -392,7 +446,10 @@ class XMLElement(XMLBaseStruct):
         yield from match_element(self)
 
     def find_between_comments(
-        self, comment1: str, comment2: str, exact_match: bool = False
+        self,
+        comment1: CommentPattern,
+        comment2: CommentPattern,
+        exact_match: bool = False,
     ) -> Generator[
         Tuple["XMLComment", List[Union["XMLElement", "XMLComment"]], "XMLComment"],
         None,
@@ -434,18 +491,80 @@ class XMLBuilder:
     def load(
         path: Union[Path, str, None], encoding: str = "utf-8-sig"
     ) -> Union[XMLElement, None]:
+        data = XMLBuilder.read_bytes(path)
+        if data is None:
+            return None
+
+        return XMLBuilder.load_from_bytes(data, encoding)
+
+    @staticmethod
+    def read_bytes(path: Union[Path, str, None]) -> Optional[bytes]:
+        """Сырое содержимое файла; None, если пути нет или файл не найден."""
         if path is None:
             return None
 
-        path = Path(path)
-        if not path.exists():
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+
+        except FileNotFoundError:
             return None
 
-        with open(path, "r", encoding=encoding) as file:
-            content = file.read()
+    @staticmethod
+    def load_from_bytes(
+        data: bytes, encoding: str = "utf-8-sig"
+    ) -> Union[XMLElement, None]:
+        """Разбирает уже прочитанное содержимое файла.
+
+        Переводы строк приводятся к "\n", как при чтении в текстовом режиме.
+        """
+        content = data.decode(encoding)
+        if "\r" in content:
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
 
         return XMLElement.build_element(content)
 
+    _readonly_local = threading.local()
+
+    @classmethod
+    def load_readonly(cls, path: Union[Path, str, None]) -> Optional[Any]:
+        """Разбирает файл через lxml только для чтения (без записи обратно).
+
+        Возвращает корневой lxml-элемент или None, если lxml не установлен,
+        файла нет или разобрать его не удалось; тогда вызывающий использует
+        обычный XMLBuilder.load. Парсер у каждого потока свой.
+        """
+        if etree is None or path is None:
+            return None
+
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+
+        except OSError:
+            return None
+
+        return cls.load_readonly_from_bytes(data)
+
+    @classmethod
+    def load_readonly_from_bytes(cls, data: bytes) -> Optional[Any]:
+        """load_readonly для уже прочитанного содержимого файла."""
+        if etree is None:
+            return None
+
+        parser = getattr(cls._readonly_local, "parser", None)
+        if parser is None:
+            # Без recover: битый файл даёт None, и вызывающий разбирает его
+            # обычным парсером, который сообщает об ошибке
+            parser = etree.XMLParser(resolve_entities=False, huge_tree=True)
+            cls._readonly_local.parser = parser
+
+        try:
+            return etree.fromstring(data, parser)
+
+        except etree.Error:
+            return None
+
     @staticmethod
     def save(
         element: XMLElement, path: Union[Path, str], encoding: str = "utf-8"
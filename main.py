@@ -1,81 +1,161 @@
-import argparse
+import atexit
+import importlib
 import logging
+import logging.handlers
 import os
-import platform
-import re
+import queue
 import signal
 import sys
-from typing import Any, Type
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import List, Optional
 
-from colorama import Fore, Style, init
+# Модули Code.* импортируются в функциях, которые их используют: так --help
+# и ошибки в аргументах не тянут за собой GUI и весь разбор модов
 
-from Code.app import App
-from Code.app.app_initializer import AppInitializer
-from Code.app_vars import AppConfig
-from Code.game import Game
-from Code.handlers import ModManager
-from Code.loc import Localization as loc
+# Поток, который пишет записи лога в консоль; запускается в configure_logging
+_log_listener: Optional[logging.handlers.QueueListener] = None
 
 
 def signal_handler(signum, frame):
     logging.info(f"Received signal {signum}. Starting graceful shutdown...")
     try:
-        App.stop()
+        # Без загруженного GUI останавливать нечего, и импортировать его ради
+        # этого не нужно
+        app_module = sys.modules.get("Code.app")
+        if app_module is not None:
+            app_module.App.stop()
     except Exception as e:
         logging.error(f"Error during graceful shutdown: {e}")
     finally:
         sys.exit(0)
 
 
-class ColoredFormatter(logging.Formatter):
-    COLORS = {
-        "DEBUG": Fore.CYAN,
-        "INFO": Fore.GREEN,
-        "WARNING": Fore.YELLOW,
-        "ERROR": Fore.RED,
-        "CRITICAL": Fore.RED + Style.BRIGHT,
-    }
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter, который форматирует дату не чаще раза в секунду.
 
-    def format(self, record):
-        color = self.COLORS.get(record.levelname, "")
-        record.levelname = f"{color}{record.levelname:<7}{Style.RESET_ALL}"
-        return super().format(record)
+    Вывод тот же, что у logging.Formatter без datefmt; strftime вызывается
+    только при смене секунды, а миллисекунды дописываются к готовой строке.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_sec: Optional[int] = None
+        self._cached_date = ""
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return super().formatTime(record, datefmt)
+
+        sec = int(record.created)
+        if sec != self._cached_sec:
+            self._cached_date = time.strftime(
+                self.default_time_format, self.converter(record.created)
+            )
+            self._cached_sec = sec
+
+        return self.default_msec_format % (self._cached_date, record.msecs)
+
+
+class ColoredFormatter(CachedTimeFormatter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # colorama нужен только цветному выводу, поэтому импортируется здесь
+        from colorama import Fore, Style
+
+        colors = {
+            logging.DEBUG: Fore.CYAN,
+            logging.INFO: Fore.GREEN,
+            logging.WARNING: Fore.YELLOW,
+            logging.ERROR: Fore.RED,
+            logging.CRITICAL: Fore.RED + Style.BRIGHT,
+        }
+        # Готовый цветной префикс уровня, чтобы не собирать его на каждую запись
+        self._prefixes = {
+            level: f"{color}{logging.getLevelName(level):<7}{Style.RESET_ALL}"
+            for level, color in colors.items()
+        }
+
+    def formatMessage(self, record):
+        prefix = self._prefixes.get(record.levelno)
+        if prefix is None:
+            return super().formatMessage(record)
+
+        # levelname подменяется только на время форматирования, чтобы запись
+        # дошла до остальных обработчиков без цветовых кодов
+        levelname = record.levelname
+        record.levelname = prefix
+        try:
+            return super().formatMessage(record)
+        finally:
+            record.levelname = levelname
 
 
 def configure_logging(debug: bool):
     log_level = logging.DEBUG if debug else logging.INFO
     log_format = "[%(asctime)s][%(levelname)s] %(name)s: %(message)s"
 
-    console_handler = logging.StreamHandler()
-    console_formatter = ColoredFormatter(log_format)
+    # Цвета нужны только терминалу; при перенаправленном выводе colorama
+    # не загружается и консоль Windows не перенастраивается
+    stream_isatty = getattr(sys.stderr, "isatty", None)
+    if stream_isatty is not None and stream_isatty():
+        from colorama import init
+
+        # init() подменяет sys.stderr обёрткой, переводящей ANSI-коды для
+        # консоли Windows, поэтому обработчик создаётся уже после него
+        init(autoreset=True)
+        console_formatter = ColoredFormatter(log_format)
+
+    else:
+        console_formatter = CachedTimeFormatter(log_format)
+
+    console_handler = logging.StreamHandler(sys.stderr)
     console_handler.setFormatter(console_formatter)
 
+    # Вызывающий поток только кладёт запись в очередь, а запись в консоль
+    # выполняет отдельный поток QueueListener
+    global _log_listener
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, console_handler, respect_handler_level=True
+    )
+    _log_listener.start()
+    atexit.register(stop_logging)
+
+    # Форматирование целиком за console_handler; без своего форматтера
+    # basicConfig поставил бы QueueHandler стандартный, и уровень с именем
+    # логгера попали бы в сообщение дважды
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    # Поля потока и процесса в формате не используются — не собираем их
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
     logging.basicConfig(
         level=log_level,
-        handlers=[console_handler],
+        handlers=[queue_handler],
         encoding="utf-8",
+        force=True,
     )
 
 
-def initialize_components(debug: bool, *components: Type[Any]) -> None:
-    for component in components:
-        logging.debug(f"Initializing {component.__name__}...")
-        init_method = getattr(component, "init", None)
-        if callable(init_method):
-            init_method(
-                debug
-            ) if "debug" in init_method.__code__.co_varnames else init_method()
-            logging.debug(f"{component.__name__} initialized successfully.")
+def stop_logging() -> None:
+    """Дописывает оставшиеся в очереди записи и останавливает поток лога."""
+    global _log_listener
+    if _log_listener is None:
+        return
 
-        else:
-            raise AttributeError(
-                f"{component.__name__} does not have a callable 'init' method."
-            )
+    listener, _log_listener = _log_listener, None
+    listener.stop()
 
 
 def check_path_for_non_ascii():
     script_path = os.path.abspath(__file__)
-    if re.search(r"[^\x00-\x7F]", script_path):
+    if not script_path.isascii():
         raise RuntimeError(
             f"The program installation path contains non-ASCII characters.\n\nCurrent path: {script_path}"
         )
@@ -87,42 +167,168 @@ def args_no_gui(
     auto_lua: bool,
     skip_intro: bool,
     process_btm: bool,
+    debug: bool = False,
 ):
-    if auto_game_path:
-        game_path = AppConfig.get_game_path()
-        if game_path is None:
-            res = Game.search_all_games_on_all_drives()
-            if res:
-                AppConfig.set("barotrauma_dir", str(res[0]))
-                AppConfig.set_steam_mods_path()
-                ModManager.load_mods()
-                ModManager.load_cslua_config()
-
-            else:
-                logging.error("Failed to set game path")
-                return
+    from Code.app_vars import AppConfig
+    from Code.game import Game
+    from Code.handlers import ModManager
+
+    # config.json с прошлых запусков: найденный однажды путь к игре
+    # сохраняется, и повторный --apath не обходит все диски заново
+    AppConfig.init(debug)
+
+    # Сохранённый путь принимается, только если там действительно игра
+    game_path = AppConfig.get_game_path()
+    if auto_game_path and (game_path is None or not Game.is_game_dir(game_path)):
+        res = Game.search_all_games_on_all_drives()
+        if not res:
+            logging.error("Failed to set game path")
+            return
+
+        AppConfig.set("barotrauma_dir", str(res[0]))
+        AppConfig.set_steam_mods_path()
+
+    def process_mods() -> None:
+        # Список модов нужен только для сохранения, читаем его здесь же.
+        # Кэш модов лежит там же, где и в GUI; без init он писался бы
+        # в mod_cache.json текущего каталога. ModManager.init не вызываем:
+        # он откатил бы изменения --pbmt при выходе
+        from Code.handlers.cache_manager import CacheManager
+
+        CacheManager.init()
+        ModManager.load_mods()
+        ModManager.save_mods()
 
+    # Обновление Lua (сеть) и сохранение модов (диск) друг от друга не
+    # зависят, поэтому идут параллельно; игра запускается после обоих
+    tasks = []
     if auto_lua:
-        Game.download_update_lua()
+        tasks.append(Game.download_update_lua)
+    if process_btm:
+        tasks.append(process_mods)
+
+    if len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            for future in [executor.submit(task) for task in tasks]:
+                future.result()
+
+    else:
+        for task in tasks:
+            task()
 
     if process_btm:
-        ModManager.save_mods()
+        # Установщик Lua меняет файлы игры, поэтому они читаются после него
+        ModManager.load_cslua_config()
 
     if start_game:
         Game.run_game(skip_intro=skip_intro)
 
 
+def wait_before_exit() -> None:
+    """Держит консоль открытой после падения, чтобы ошибку успели прочитать.
+
+    Без интерактивного ввода (CI, перенаправленный stdin) выходит сразу.
+    """
+    stdin = sys.stdin
+    if stdin is None or not stdin.isatty():
+        return
+
+    if sys.platform == "win32":
+        import msvcrt
+
+        msvcrt.getch()
+        return
+
+    try:
+        input()
+    except EOFError:
+        pass
+
+
+# Модули, которые main() импортирует первым делом
+GUI_MODULES = (
+    "Code.app",
+    "Code.app.app_initializer",
+    "Code.app_vars",
+    "Code.handlers",
+    "Code.loc",
+)
+
+
+def preload_gui_modules() -> None:
+    """Начинает импорт модулей GUI в фоновом потоке.
+
+    Пока главный поток заканчивает настройку, модули успевают загрузиться;
+    если поток не успел или импорт в нём упал, main() просто импортирует
+    их сам.
+    """
+
+    def worker() -> None:
+        for name in GUI_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                return
+
+    threading.Thread(target=worker, name="gui-preload", daemon=True).start()
+
+
+# Все флаги программы — простые store_true: (флаг, имя в args, справка)
+CLI_FLAGS = (
+    ("--debug", "debug", "Enable debug mode"),
+    ("--ngui", "ngui", "Disable GUI startup"),
+    ("--sg", "sg", "Start the game automatically"),
+    ("--apath", "apath", "Set the game path automatically"),
+    ("--alua", "alua", "Update/install Lua automatically"),
+    ("--si", "si", "Skip intro (requires --sg)"),
+    ("--pbmt", "pbmt", "Process modifications"),
+)
+
+
+def parse_args(argv: List[str]) -> SimpleNamespace:
+    """Разбирает флаги командной строки.
+
+    Известные флаги разбираются сравнением строк; argparse загружается
+    только ради --help, сокращённых или неизвестных аргументов, чтобы
+    вывести справку или ошибку в привычном виде.
+    """
+    given = set(argv)
+    known = {flag for flag, _, _ in CLI_FLAGS}
+    if given <= known:
+        return SimpleNamespace(**{name: flag in given for flag, name, _ in CLI_FLAGS})
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    for flag, _, help_text in CLI_FLAGS:
+        parser.add_argument(flag, action="store_true", help=help_text)
+
+    return parser.parse_args(argv)
+
+
 def main(debug: bool):
     logging.debug("Starting program...")
-    try:
-        signal.signal(signal.SIGTERM, signal_handler)
-        signal.signal(signal.SIGINT, signal_handler)
-    except Exception as e:
-        logging.warning(f"Failed to set up signal handlers: {e}")
+    from Code.app import App
+    from Code.app.app_initializer import AppInitializer
+    from Code.app_vars import AppConfig
+    from Code.handlers import ModManager
+    from Code.loc import Localization as loc
 
     try:
-        initialize_components(debug, AppConfig, loc, ModManager, AppInitializer)
+        # Порядок важен: конфиг нужен локализации и менеджеру модов
+        AppConfig.init(debug)
+        loc.init()
+        ModManager.init()
+        AppInitializer.init()
         logging.debug("Initialization complete.")
+
+        # Обработчики ставятся, только когда App уже есть что останавливать
+        try:
+            signal.signal(signal.SIGTERM, signal_handler)
+            signal.signal(signal.SIGINT, signal_handler)
+        except Exception as e:
+            logging.warning(f"Failed to set up signal handlers: {e}")
+
         App.run()
     except Exception as e:
         logging.error(
@@ -132,48 +338,43 @@ def main(debug: bool):
         logging.debug("Application terminated.")
 
 
-if __name__ == "__main__":
+def main_cli() -> None:
+    """Точка входа: разбирает аргументы и запускает GUI или --ngui режим."""
     try:
-        init(autoreset=True)
         check_path_for_non_ascii()
 
-        parser = argparse.ArgumentParser()
-        parser.add_argument("--debug", action="store_true", help="Enable debug mode")
-        parser.add_argument("--ngui", action="store_true", help="Disable GUI startup")
-        parser.add_argument(
-            "--sg", action="store_true", help="Start the game automatically"
-        )
-        parser.add_argument(
-            "--apath", action="store_true", help="Set the game path automatically"
-        )
-        parser.add_argument(
-            "--alua", action="store_true", help="Update/install Lua automatically"
-        )
-        parser.add_argument(
-            "--si", action="store_true", help="Skip intro (requires --sg)"
-        )
-        parser.add_argument("--pbmt", action="store_true", help="Process modifications")
-        args = parser.parse_args()
+        args = parse_args(sys.argv[1:])
 
-        configure_logging(args.debug)
+        if sys.platform == "win32":
+            # PYTHONIOENCODING/PYTHONUTF8 читаются только при старте
+            # интерпретатора, поэтому кодировку меняем у самих потоков
+            for stream in (sys.stdout, sys.stderr):
+                reconfigure = getattr(stream, "reconfigure", None)
+                if reconfigure is not None:
+                    reconfigure(encoding="utf-8", errors="replace")
 
-        platform_name = platform.system()
-        if platform_name == "Windows":
-            os.environ["PYTHONIOENCODING"] = "utf-8"
-            os.environ["PYTHONUTF8"] = "1"
+        configure_logging(args.debug)
+        if not args.ngui:
+            preload_gui_modules()
 
-        elif platform_name == "Darwin":
+        if sys.platform == "darwin":
             logging.warning(
                 "ModLoader may have bugs on MacOS. Please report any issues to https://github.com/themanyfaceddemon/Mod_Loader/issues"
             )
-        del platform_name
 
         if args.ngui:
-            args_no_gui(args.sg, args.apath, args.alua, args.si, args.pbmt)
+            args_no_gui(
+                args.sg, args.apath, args.alua, args.si, args.pbmt, debug=args.debug
+            )
 
         else:
             main(args.debug)
 
     except Exception:
         logging.critical("Unhandled exception occurred.", exc_info=True)
-        input()
+        stop_logging()
+        wait_before_exit()
+
+
+if __name__ == "__main__":
+    main_cli()